@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'event_management.settings')
+# Serve the read-heavy endpoints with their native async views (see event_users.async_views)
+os.environ.setdefault('USE_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
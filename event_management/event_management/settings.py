@@ -11,6 +11,9 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
 from pathlib import Path
+import os
+
+import django
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -48,6 +51,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'event_users.middleware.AdaptiveConcurrencyMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,15 +87,60 @@ WSGI_APPLICATION = 'event_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-        'OPTIONS': {
-            'timeout': 20,  # Increase the timeout (in seconds)
+# Persistent connections (seconds) instead of reconnecting on every request; 0 disables
+CONN_MAX_AGE = int(os.getenv('CONN_MAX_AGE', 60))
+
+if os.getenv('DATABASE_ENGINE', 'sqlite') == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('POSTGRES_DB', 'eventmanagement'),
+            'USER': os.getenv('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
+            'HOST': os.getenv('POSTGRES_HOST', 'localhost'),  # Point at PgBouncer to pool across processes
+            'PORT': os.getenv('POSTGRES_PORT', ''),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
         }
     }
+    # Connections are pooled by PgBouncer (Django 4.2 has no in-process pool). In transaction
+    # pooling mode a server-side cursor can't outlive its transaction's server connection,
+    # so .iterator() must fall back to client-side cursors
+    if os.getenv('POSTGRES_PGBOUNCER') == '1':
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': 20,  # Increase the timeout (in seconds)
+            }
+        }
+    }
+    # Take the write lock at BEGIN so concurrent writers queue on the busy timeout
+    # instead of failing with "database is locked" when upgrading a read lock
+    if django.VERSION >= (5, 1):
+        DATABASES['default']['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    else:
+        DATABASES['default']['ENGINE'] = 'event_users.backends.sqlite3'
+
+# PRAGMAs applied to every new SQLite connection (see event_users.db); SQLITE_PROFILE=default disables them
+SQLITE_PROFILES = {
+    'default': {},
+    'tuned': {
+        'journal_mode': 'WAL',  # Readers no longer block the writer and vice versa
+        'synchronous': 'NORMAL',  # Safe with WAL; fsync on checkpoint instead of every commit
+        'mmap_size': 256 * 1024 * 1024,
+        'cache_size': -64 * 1024,  # Negative means KiB: 64 MiB page cache
+        'temp_store': 'MEMORY',
+    },
 }
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'tuned')
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]
 
 # DATABASES = {
 # 'default': {
@@ -139,6 +188,13 @@ REST_FRAMEWORK = {
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',  # Optional, if you want to include search filter by default
     ),
+    # Sliding-window limits enforced in Redis for the login and token refresh endpoints
+    'DEFAULT_THROTTLE_RATES': {
+        'login_username': '5/min',
+        'login_ip': '20/min',
+        'token_refresh_user': '10/min',
+        'token_refresh_ip': '60/min',
+    },
 }
 
 SIMPLE_JWT = {
@@ -199,7 +255,93 @@ CELERY_BEAT_SCHEDULE = {
         # 'schedule': crontab(minute='*/1'),  # Run every minute
 
     },
+    'purge_deleted_events': {
+        'task': 'event_users.tasks.purge_deleted_events',
+        'schedule': crontab(minute=0),  # Hourly sweep for purges that never finished
+    },
+    'archive_registrations': {
+        'task': 'event_users.tasks.archive_registrations',
+        'schedule': crontab(hour=3, minute=30),  # Nightly, outside peak hours
+    },
+    'materialize_event_series': {
+        'task': 'event_users.tasks.materialize_event_series',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    'relay_outbox': {
+        'task': 'event_users.tasks.relay_outbox',
+        'schedule': timedelta(seconds=10),
+    },
+    'purge_stale_imports': {
+        'task': 'event_users.tasks.purge_stale_imports',
+        'schedule': crontab(minute=30),
+    },
+}
+
+# Attendee uploads and generated reports go through default_storage: the web process writes
+# the upload and a Celery worker reads it, so both must see the same MEDIA_ROOT (a shared
+# volume when they run on different hosts, or a shared storage backend such as S3)
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', BASE_DIR)
+# Uploads still in imports/ after this long belonged to a task that died; they hold plaintext passwords
+IMPORT_UPLOAD_MAX_AGE_HOURS = 6
+
+# Route the read-heavy endpoints to native async views; asgi.py turns this on
+USE_ASYNC_VIEWS = os.getenv('USE_ASYNC_VIEWS') == '1'
+
+# How far ahead recurring event series are materialized into events
+EVENT_SERIES_HORIZON_DAYS = 90
+
+# Refuse registrations that overlap the attendee's existing ones (can be set per request with check_conflicts)
+REGISTRATION_CHECK_CONFLICTS = False
+
+# Seconds the organizer capacity overview is cached for; 0 disables caching
+CAPACITY_OVERVIEW_CACHE_SECONDS = 0
+
+# Redis used for the refresh token blacklist and login rate limiting
+AUTH_REDIS_URL = os.getenv('AUTH_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/1'))
+
+# Write-behind audit log: entries are buffered in process and bulk-inserted every AUDIT_LOG_FLUSH_INTERVAL
+# seconds (0 disables the background flusher) or once AUDIT_LOG_FLUSH_SIZE are waiting. 'celery' hands the
+# batches to a worker instead of inserting them from the web process
+AUDIT_LOG_FLUSH_SIZE = 200
+AUDIT_LOG_FLUSH_INTERVAL = 2
+AUDIT_LOG_MAX_BUFFER = 5000
+# After a failed write, requests stop flushing inline for this many seconds; entries that overflow
+# AUDIT_LOG_MAX_BUFFER meanwhile go to AUDIT_LOG_SPILL_FILE, to be replayed with deserialize_entry
+AUDIT_LOG_RETRY_INTERVAL = 5
+AUDIT_LOG_SPILL_FILE = os.getenv('AUDIT_LOG_SPILL_FILE', BASE_DIR / 'audit_spill.log')
+AUDIT_LOG_WRITER = os.getenv('AUDIT_LOG_WRITER', 'direct')
+
+# Adaptive (AIMD) concurrency limits per worker process for the route groups that may be shed
+# with 503 under load; reads and check-ins are only measured. See event_users/middleware.py
+CONCURRENCY_LIMITS = {
+    'write': {'initial': 16, 'minimum': 2, 'maximum': 128, 'target_latency': 0.5},
+    # Password hashing makes logins slow on purpose, hence the higher latency target
+    'auth': {'initial': 8, 'minimum': 1, 'maximum': 64, 'target_latency': 1.5},
+}
+
+# HMAC keys for check-in tickets, by key id. New tickets are signed with TICKET_SIGNING_KEY_ID;
+# to rotate, add a new key, switch the id, and drop the old key once its tickets are no longer needed.
+TICKET_SIGNING_KEYS = {
+    'v1': os.getenv('TICKET_SIGNING_KEY', SECRET_KEY),
 }
+TICKET_SIGNING_KEY_ID = 'v1'
+
+# Webhook relay: outbox rows per delivery, request timeout and retry backoff (seconds)
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_TIMEOUT = 5
+WEBHOOK_BACKOFF_BASE = 10
+WEBHOOK_BACKOFF_MAX = 3600
+# Outbox rows are relayed once they are this many seconds old, so ids committed out of order aren't skipped
+WEBHOOK_VISIBILITY_LAG = 30
+
+# Number of registrations removed per DELETE when purging a deleted event
+EVENT_PURGE_BATCH_SIZE = 1000
+# The hourly sweep only re-enqueues purges of events deleted longer ago than this
+EVENT_PURGE_GRACE_MINUTES = 60
+
+# Registrations of events that ended more than this many days ago are moved to the archive table
+REGISTRATION_ARCHIVE_AFTER_DAYS = 30
+REGISTRATION_ARCHIVE_BATCH_SIZE = 1000
 
 
 
@@ -211,6 +353,11 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'audit_spill': {
+            'class': 'logging.FileHandler',
+            'filename': AUDIT_LOG_SPILL_FILE,
+            'delay': True,  # The file is only created once something spills
+        },
     },
     'loggers': {
         'django': {
@@ -222,6 +369,11 @@ LOGGING = {
             'handlers': ['console'],
             'level': 'DEBUG',  # Adjust level to DEBUG for more verbosity
         },
+        'event_users.audit.spill': {
+            'handlers': ['audit_spill'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
     },
 }
 
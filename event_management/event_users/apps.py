@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class EventUsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'event_users'
+
+    def ready(self):
+        from .db import configure_sqlite_connection
+        connection_created.connect(configure_sqlite_connection, dispatch_uid='event_users.configure_sqlite_connection')
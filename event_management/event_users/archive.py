@@ -0,0 +1,94 @@
+import logging
+from datetime import timedelta
+from itertools import chain
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now
+
+from .models import ArchivedRegistration, Event, Registration
+
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_COLUMNS = ('id', 'user_id', 'event_id', 'registration_time', 'checked_in')
+
+
+def _move_batch(registration_ids, archived_at):
+    """Copy one batch into the archive with INSERT ... SELECT and delete it from the hot table."""
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(column) for column in ARCHIVED_COLUMNS)
+    placeholders = ', '.join(['%s'] * len(registration_ids))
+    sql = (
+        f"INSERT INTO {quote(ArchivedRegistration._meta.db_table)} ({columns}, {quote('archived_at')}) "
+        f"SELECT {columns}, %s FROM {quote(Registration._meta.db_table)} WHERE {quote('id')} IN ({placeholders})"
+    )
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [archived_at, *registration_ids])
+        return Registration.objects.filter(id__in=registration_ids)._raw_delete(connection.alias)
+
+
+def archive_event_registrations(event, batch_size=None):
+    """Move all of an event's registrations into the archive table, one bounded batch at a time."""
+    batch_size = batch_size or getattr(settings, 'REGISTRATION_ARCHIVE_BATCH_SIZE', 1000)
+    archived_at = now()
+    moved = 0
+
+    while True:
+        batch_ids = list(Registration.objects.filter(event=event).order_by('id').values_list('id', flat=True)[:batch_size])
+        if not batch_ids:
+            break
+        moved += _move_batch(batch_ids, archived_at)
+
+    return moved
+
+
+def archive_past_registrations(days=None, batch_size=None):
+    """Archive registrations of every event that ended more than `days` days ago."""
+    days = days if days is not None else getattr(settings, 'REGISTRATION_ARCHIVE_AFTER_DAYS', 30)
+    cutoff = now() - timedelta(days=days)
+
+    # Only ended events that still have rows in the hot table
+    event_ids = Registration.objects.filter(event__end_time__lt=cutoff).values_list('event_id', flat=True).distinct()
+    archived = {}
+    for event in Event.objects.filter(id__in=list(event_ids)):
+        archived[event.id] = archive_event_registrations(event, batch_size)
+        logger.info(f"Archived {archived[event.id]} registrations for event: {event.title}")
+
+    if archived and connection.vendor == 'sqlite':
+        # Refresh the planner statistics the admin's estimated counts read (PostgreSQL's autovacuum does this itself)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Registration._meta.db_table)}')
+    return archived
+
+
+def registration_history(**filters):
+    """Hot and archived registrations matching `filters`, with the event preloaded for serialization."""
+    return list(chain(
+        Registration.objects.filter(**filters).select_related('event'),
+        ArchivedRegistration.objects.filter(**filters).select_related('event'),
+    ))
+
+
+def registered_count(event):
+    """Registrations of an event, including those already moved to the archive."""
+    return Registration.objects.filter(event=event).count() + ArchivedRegistration.objects.filter(event=event).count()
+
+
+async def aregistered_count(event):
+    return await Registration.objects.filter(event=event).acount() + await ArchivedRegistration.objects.filter(event=event).acount()
+
+
+def _count_per_event(model, **filters):
+    counts = model.objects.filter(event=OuterRef('pk'), **filters).order_by().values('event').annotate(
+        total=Count('id')
+    ).values('total')
+    return Coalesce(Subquery(counts), 0)
+
+
+def registered_count_annotation(**filters):
+    """Per-event registration count over the hot and archive tables, for Event.objects.annotate()."""
+    return _count_per_event(Registration, **filters) + _count_per_event(ArchivedRegistration, **filters)
@@ -0,0 +1,136 @@
+"""
+Native async versions of the read-heavy views, served when running under ASGI.
+
+DRF views are synchronous, so under ASGI every request to them is pushed
+through a thread. These views use Django's async ORM instead and keep the
+same URLs, permissions and response bodies as their sync counterparts.
+"""
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views import View
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .archive import aregistered_count, registered_count_annotation
+from .feeds import InvalidFeedQuery, available_events_feed, feed_page
+from .models import ArchivedRegistration, CustomUser, Event, Registration
+from .serializers import EventSerializer, RegistrationSerializer
+from .views import EventViewSet
+
+
+# Event updates and deletes still go through the sync viewset
+sync_event_write_view = sync_to_async(EventViewSet.as_view({'put': 'update', 'delete': 'destroy'}))
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=DjangoJSONEncoder)
+
+
+class AsyncAPIView(View):
+    """Async base view: JWT authentication with an async user lookup plus a role check."""
+    required_role = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Bearer-token only, like the DRF views they replace (APIView.as_view is csrf_exempt too)
+        view.csrf_exempt = True
+        return view
+
+    async def authenticate(self, request):
+        authentication = JWTAuthentication()
+        header = authentication.get_header(request)
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        # Token validation is pure CPU; only the user lookup touches the database
+        validated_token = authentication.get_validated_token(raw_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        return await CustomUser.objects.filter(is_active=True).aget(**{api_settings.USER_ID_FIELD: user_id})
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            user = await self.authenticate(request)
+        except (InvalidToken, TokenError, CustomUser.DoesNotExist):
+            return _json({'detail': 'Given token not valid for any token type'}, status=401)
+        if user is None:
+            return _json({'detail': 'Authentication credentials were not provided.'}, status=401)
+        if self.required_role and user.role != self.required_role:
+            return _json({'detail': 'You do not have permission to perform this action.'}, status=403)
+
+        request.user = user
+        return await super().dispatch(request, *args, **kwargs)
+
+
+class AsyncAvailableEventsView(AsyncAPIView):
+    """Async AvailableEventsView."""
+    required_role = 'Attendee'
+
+    async def get(self, request):
+        try:
+            available_events, page_size = available_events_feed(request.user, request.GET)
+        except InvalidFeedQuery as exc:
+            return _json({'detail': str(exc)}, status=400)
+
+        events, next_cursor = feed_page([event async for event in available_events], page_size)
+        if not events and 'after' not in request.GET:
+            return _json({'detail': 'No upcoming events available.'}, status=404)
+        return _json({'next': next_cursor, 'results': EventSerializer(events, many=True).data})
+
+
+class AsyncCapacityStatusView(AsyncAPIView):
+    """Async CapacityStatusView."""
+    required_role = 'Organizer'
+
+    async def get(self, request, event_id):
+        try:
+            event = await Event.objects.aget(pk=event_id)
+        except Event.DoesNotExist:
+            return _json({'detail': 'Not found.'}, status=404)
+
+        if event.organizer_id != request.user.id:
+            return _json({'detail': 'You are not the organizer of this event.'}, status=403)
+
+        registered_count = await aregistered_count(event)
+        return _json({
+            'total_capacity': event.capacity,
+            'registered_count': registered_count,
+            'remaining_capacity': event.capacity - registered_count,
+        })
+
+
+class AsyncEventDetailView(AsyncAPIView):
+    """Async event retrieve; writes are handed to the sync EventViewSet."""
+    required_role = 'Organizer'
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method in ('PUT', 'DELETE'):
+            # The sync viewset authenticates and checks permissions itself
+            return await sync_event_write_view(request, *args, **kwargs)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get(self, request, pk):
+        try:
+            event = await Event.objects.annotate(
+                registered_count=registered_count_annotation()
+            ).aget(pk=pk, organizer=request.user)
+        except Event.DoesNotExist:
+            return _json({'detail': 'Not found.'}, status=404)
+        return _json(EventSerializer(event).data)
+
+
+class AsyncRegistrationListView(AsyncAPIView):
+    """Async RegistrationViewSet.list."""
+    required_role = 'Attendee'
+
+    async def get(self, request):
+        registrations = Registration.objects.filter(
+            user=request.user, event__is_deleted=False
+        ).select_related('event')
+        archived = ArchivedRegistration.objects.filter(
+            user=request.user, event__is_deleted=False
+        ).select_related('event')
+        history = [registration async for registration in registrations] + [registration async for registration in archived]
+        return _json(RegistrationSerializer(history, many=True).data)
@@ -0,0 +1,174 @@
+import atexit
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from .models import AuditLogEntry
+
+
+logger = logging.getLogger(__name__)
+# Entries that could not be written and no longer fit in the buffer, one JSON object per line
+spill_logger = logging.getLogger('event_users.audit.spill')
+
+AUDIT_FIELDS = ('action', 'event_id', 'user_id', 'actor_id', 'source', 'registration_id')
+
+
+class AuditBuffer:
+    """
+    Bounded in-process buffer of audit entries, written behind with one bulk INSERT
+    per batch: by a background thread every AUDIT_LOG_FLUSH_INTERVAL seconds or as
+    soon as AUDIT_LOG_FLUSH_SIZE entries are waiting, and by whoever fills it up to
+    AUDIT_LOG_MAX_BUFFER (backpressure rather than dropping entries). A failed write
+    puts the batch back for the next flush; the buffer is flushed at interpreter
+    exit and on Celery worker shutdown.
+
+    While writes are failing, requests don't retry them inline for
+    AUDIT_LOG_RETRY_INTERVAL seconds, and entries past AUDIT_LOG_MAX_BUFFER are
+    moved, oldest first, to the spill log (counted in `spilled`).
+    """
+
+    def __init__(self):
+        self.entries = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One writer at a time keeps batches in order
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._failed_at = None
+        self.spilled = 0
+
+    @property
+    def flush_size(self):
+        return getattr(settings, 'AUDIT_LOG_FLUSH_SIZE', 200)
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUDIT_LOG_MAX_BUFFER', 5000)
+
+    @property
+    def flush_interval(self):
+        return getattr(settings, 'AUDIT_LOG_FLUSH_INTERVAL', 2)
+
+    @property
+    def retry_interval(self):
+        return getattr(settings, 'AUDIT_LOG_RETRY_INTERVAL', 5)
+
+    def _recently_failed(self):
+        failed_at = self._failed_at
+        return failed_at is not None and time.monotonic() - failed_at < self.retry_interval
+
+    def add(self, entries):
+        with self._lock:
+            self.entries.extend(entries)
+            size = len(self.entries)
+
+        if self._recently_failed():
+            # The database or broker is down: requests don't wait on a write that just failed
+            self._spill_overflow()
+            if self.flush_interval:
+                self._ensure_flusher()
+        elif size >= self.max_size:
+            # Full: this caller writes the buffer out rather than dropping entries
+            self.flush()
+        elif not self.flush_interval:
+            # No background thread: the caller that completes a batch writes it
+            if size >= self.flush_size:
+                self.flush()
+        else:
+            self._ensure_flusher()
+            if size >= self.flush_size:
+                self._wakeup.set()
+
+    def flush(self):
+        """Write out everything buffered so far; returns the number of entries written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self.entries = self.entries, []
+            if not batch:
+                return 0
+            try:
+                self._write(batch)
+            except Exception as exc:
+                self._failed_at = time.monotonic()
+                with self._lock:
+                    self.entries[:0] = batch
+                logger.error(f"Audit log flush of {len(batch)} entries failed, keeping them buffered: {exc}")
+                self._spill_overflow()
+                return 0
+            self._failed_at = None
+            return len(batch)
+
+    def _spill_overflow(self):
+        """Keep the buffer within AUDIT_LOG_MAX_BUFFER by moving the oldest entries to the spill log."""
+        with self._lock:
+            overflow = len(self.entries) - self.max_size
+            if overflow <= 0:
+                return
+            spilled, self.entries = self.entries[:overflow], self.entries[overflow:]
+            self.spilled += overflow
+        for entry in spilled:
+            spill_logger.warning(json.dumps(serialize_entry(entry)))
+        logger.error(f"Audit log buffer full while writes fail, spilled {overflow} entries ({self.spilled} in total)")
+
+    def _write(self, batch):
+        if getattr(settings, 'AUDIT_LOG_WRITER', 'direct') == 'celery':
+            from .tasks import write_audit_entries
+            write_audit_entries.delay([serialize_entry(entry) for entry in batch])
+        else:
+            AuditLogEntry.objects.bulk_create(batch, batch_size=self.flush_size)
+
+    def _ensure_flusher(self):
+        # Started on first use, so a forked web worker gets its own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='audit-log-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            # This thread's connection is only needed again at the next flush
+            connections.close_all()
+
+
+audit_buffer = AuditBuffer()
+atexit.register(audit_buffer.flush)
+
+
+def serialize_entry(entry):
+    data = {field: getattr(entry, field) for field in AUDIT_FIELDS}
+    data['occurred_at'] = entry.occurred_at.isoformat()
+    return data
+
+
+def deserialize_entry(data):
+    return AuditLogEntry(occurred_at=parse_datetime(data['occurred_at']), **{field: data[field] for field in AUDIT_FIELDS})
+
+
+def audit(action, event_id, user_id, actor_id=None, source='api', registration_id=None):
+    """Queue one audit entry; it is buffered once the surrounding transaction commits."""
+    audit_many(action, event_id, [user_id], actor_id=actor_id, source=source, registration_id=registration_id)
+
+
+def audit_many(action, event_id, user_ids, actor_id=None, source='api', registration_id=None):
+    """Queue one audit entry per user, all stamped with the current time."""
+    occurred_at = now()
+    entries = [
+        AuditLogEntry(
+            action=action, event_id=event_id, user_id=user_id, actor_id=actor_id,
+            source=source, registration_id=registration_id, occurred_at=occurred_at,
+        )
+        for user_id in user_ids
+    ]
+    if entries:
+        # A rolled-back change leaves no audit entry behind
+        transaction.on_commit(lambda: audit_buffer.add(entries))
@@ -0,0 +1,87 @@
+from datetime import timezone
+
+from django.db.models import Count, Exists, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import now
+
+from .models import Event, Registration
+
+
+FEED_PAGE_SIZE = 50
+FEED_MAX_PAGE_SIZE = 200
+
+
+class InvalidFeedQuery(ValueError):
+    """Raised for malformed feed query parameters."""
+
+
+def _parse_datetime_param(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise InvalidFeedQuery(f'"{name}" must be an ISO 8601 date-time.')
+    return parsed
+
+
+def available_events_feed(user, params):
+    """
+    Future events with seats left that `user` is not registered for, as one query.
+
+    Registered counts come from a correlated subquery and existing registrations
+    are excluded with an anti-join (NOT EXISTS), so the database can walk the
+    start_time index and stop at the page size instead of aggregating every
+    upcoming event. Pages are keyset-paginated on (start_time, id) via `after`.
+    Returns the queryset (page_size + 1 rows, see feed_page) and the page size.
+    """
+    try:
+        page_size = max(1, min(int(params.get('page_size', FEED_PAGE_SIZE)), FEED_MAX_PAGE_SIZE))
+    except ValueError:
+        raise InvalidFeedQuery('"page_size" must be a number.')
+
+    registered_count = Registration.objects.filter(event=OuterRef('pk')).order_by().values('event').annotate(
+        total=Count('id')
+    ).values('total')
+
+    events = Event.objects.filter(start_time__gt=now()).annotate(
+        registered_count=Coalesce(Subquery(registered_count), 0),
+    ).filter(
+        registered_count__lt=F('capacity'),
+    ).exclude(
+        Exists(Registration.objects.filter(event=OuterRef('pk'), user=user)),
+    )
+
+    start_after = _parse_datetime_param(params, 'start_after')
+    if start_after:
+        events = events.filter(start_time__gte=start_after)
+    start_before = _parse_datetime_param(params, 'start_before')
+    if start_before:
+        events = events.filter(start_time__lt=start_before)
+    if params.get('location'):
+        events = events.filter(location__icontains=params['location'])
+    if params.get('search'):
+        events = events.filter(Q(title__icontains=params['search']) | Q(description__icontains=params['search']))
+
+    # Cursor is "<start_time>,<id>" of the last event on the previous page
+    after = params.get('after')
+    if after:
+        after_start, _, after_id = after.rpartition(',')
+        after_start = parse_datetime(after_start)
+        if after_start is None or not after_id.isdigit():
+            raise InvalidFeedQuery('"after" is not a valid cursor.')
+        events = events.filter(Q(start_time__gt=after_start) | Q(start_time=after_start, id__gt=int(after_id)))
+
+    return events.order_by('start_time', 'id')[:page_size + 1], page_size
+
+
+def feed_page(events, page_size):
+    """Split the page_size + 1 fetched events into the page and the cursor for the next one."""
+    events = list(events)
+    next_cursor = None
+    if len(events) > page_size:
+        events = events[:page_size]
+        # UTC with a "Z" suffix keeps the cursor URL-safe (no "+" offset)
+        next_cursor = f"{events[-1].start_time.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')},{events[-1].id}"
+    return events, next_cursor
@@ -0,0 +1,130 @@
+import math
+
+from django.db.models import ExpressionWrapper, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # ~5 m cells, stored on every event with coordinates
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+# Upper bound for range scans: sorts after every geohash character
+GEOHASH_RANGE_END = '{'
+MAX_COVER_CELLS = 16
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash; nearby points share a prefix, so one cell is one index range."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = value = 0
+    return ''.join(chars)
+
+
+def _cell_size(precision):
+    """(height, width) in degrees of a geohash cell; longitude gets the extra bit on odd lengths."""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, lon_ranges) enclosing the circle. Longitude is a list of
+    ranges because a box crossing the antimeridian is split in two.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    min_lat = latitude - math.degrees(angular)
+    max_lat = latitude + math.degrees(angular)
+    if min_lat <= -90 or max_lat >= 90:
+        # The circle contains a pole, so every longitude is in range
+        return max(min_lat, -90.0), min(max_lat, 90.0), [(-180.0, 180.0)]
+
+    delta_lon = math.degrees(math.asin(min(1.0, math.sin(angular) / math.cos(math.radians(latitude)))))
+    west, east = longitude - delta_lon, longitude + delta_lon
+    if west < -180:
+        return min_lat, max_lat, [(west + 360, 180.0), (-180.0, east)]
+    if east > 180:
+        return min_lat, max_lat, [(west, 180.0), (-180.0, east - 360)]
+    return min_lat, max_lat, [(west, east)]
+
+
+def _steps(start, end, size):
+    count = int((end - start) / size) + 1
+    return [min(start + i * size, end) for i in range(count)] + [end]
+
+
+def covering_cells(min_lat, max_lat, lon_ranges):
+    """
+    Geohash cells covering the box, at the finest precision that needs at most
+    MAX_COVER_CELLS of them (each becomes one index range scan).
+    """
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        height, width = _cell_size(precision)
+        rows = int((max_lat - min_lat) / height) + 2
+        columns = sum(int((east - west) / width) + 2 for west, east in lon_ranges)
+        if rows * columns <= MAX_COVER_CELLS or precision == 1:
+            break
+
+    cells = set()
+    for west, east in lon_ranges:
+        for lat in _steps(min_lat, max_lat, height):
+            for lon in _steps(west, east, width):
+                cells.add(encode_geohash(lat, lon, precision))
+    return sorted(cells)
+
+
+def distance_km(latitude, longitude):
+    """
+    Haversine distance in km from the point to each row's coordinates, as a query
+    expression: the whole candidate set is computed, filtered and ranked in one
+    statement instead of row by row in Python.
+    """
+    lat1, lon1 = math.radians(latitude), math.radians(longitude)
+    lat2, lon2 = Radians('latitude'), Radians('longitude')
+    a = (
+        Power(Sin((lat2 - Value(lat1)) / 2), 2)
+        + Value(math.cos(lat1)) * Cos(lat2) * Power(Sin((lon2 - Value(lon1)) / 2), 2)
+    )
+    return ExpressionWrapper(2 * EARTH_RADIUS_KM * ASin(Sqrt(a)), output_field=FloatField())
+
+
+def nearby_events(events, latitude, longitude, radius_km, limit):
+    """
+    Events from the `events` queryset within `radius_km`, nearest first, as
+    (id, distance_km) pairs. The geohash cells covering the bounding box turn
+    into index range scans, the box itself trims the cell edges, and only the
+    surviving rows are ranked by exact haversine distance.
+    """
+    min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_km)
+
+    in_cells = Q()
+    for cell in covering_cells(min_lat, max_lat, lon_ranges):
+        in_cells |= Q(geohash__gte=cell, geohash__lt=cell + GEOHASH_RANGE_END)
+    in_box = Q()
+    for west, east in lon_ranges:
+        in_box |= Q(longitude__gte=west, longitude__lte=east)
+
+    nearest = (
+        events.filter(in_cells, in_box, latitude__gte=min_lat, latitude__lte=max_lat)
+        .annotate(distance_km=distance_km(latitude, longitude))
+        .filter(distance_km__lte=radius_km)
+        .order_by('distance_km', 'id')
+        .values_list('id', 'distance_km')[:limit]
+    )
+    return list(nearest)
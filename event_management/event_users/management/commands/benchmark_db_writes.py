@@ -0,0 +1,144 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+
+SCHEMA = 'CREATE TABLE IF NOT EXISTS bench_registration (id INTEGER PRIMARY KEY, event_id INTEGER, user_id INTEGER)'
+INDEX = 'CREATE INDEX IF NOT EXISTS bench_registration_event ON bench_registration (event_id)'
+
+
+def _sqlite_writer(path, pragmas, deadline, worker, results, lock):
+    """Register-like transactions (capacity count, then insert) on a private SQLite connection."""
+    db = sqlite3.connect(path, timeout=20, isolation_level=None)
+    for pragma, value in pragmas.items():
+        db.execute(f'PRAGMA {pragma} = {value}')
+
+    done = errors = 0
+    latencies = []
+    user_id = worker * 10_000_000
+    while time.perf_counter() < deadline:
+        user_id += 1
+        started = time.perf_counter()
+        try:
+            db.execute('BEGIN')
+            db.execute('SELECT COUNT(*) FROM bench_registration WHERE event_id = ?', (user_id % 50,)).fetchone()
+            db.execute('INSERT INTO bench_registration (event_id, user_id) VALUES (?, ?)', (user_id % 50, user_id))
+            db.execute('COMMIT')
+            done += 1
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            # "database is locked": the deferred read lock could not be upgraded
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+    db.close()
+
+    with lock:
+        results['done'] += done
+        results['errors'] += errors
+        results['latencies'].extend(latencies)
+
+
+def _django_writer(alias, deadline, worker, results, lock):
+    """Same workload through a Django connection, so the configured backend and its settings apply."""
+    connection = connections[alias]
+    done = errors = 0
+    latencies = []
+    user_id = worker * 10_000_000
+    while time.perf_counter() < deadline:
+        user_id += 1
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(using=alias), connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM bench_registration WHERE event_id = %s', [user_id % 50])
+                cursor.fetchone()
+                cursor.execute('INSERT INTO bench_registration (event_id, user_id) VALUES (%s, %s)', [user_id % 50, user_id])
+            done += 1
+            latencies.append(time.perf_counter() - started)
+        except OperationalError:
+            errors += 1
+    connection.close()
+
+    with lock:
+        results['done'] += done
+        results['errors'] += errors
+        results['latencies'].extend(latencies)
+
+
+class Command(BaseCommand):
+    help = (
+        "Concurrent-writer benchmark: runs register-like transactions from many threads against "
+        "a scratch SQLite file per profile in SQLITE_PROFILES, or against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, nargs='+', default=[1, 8, 32])
+        parser.add_argument('--duration', type=float, default=5, help="Seconds per run.")
+        parser.add_argument('--profiles', nargs='+', help="SQLite profiles to compare (default: all).")
+        parser.add_argument(
+            '--configured', action='store_true',
+            help="Benchmark the configured 'default' database (e.g. PostgreSQL) in a scratch table.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{'profile':<14}{'writers':>8}{'commits':>10}{'locked':>8}{'tx/s':>10}{'p99 ms':>9}")
+
+        if options['configured']:
+            self._run_configured(options)
+            return
+
+        profiles = options['profiles'] or list(settings.SQLITE_PROFILES)
+        unknown = set(profiles) - set(settings.SQLITE_PROFILES)
+        if unknown:
+            raise CommandError(f"Unknown SQLite profiles: {', '.join(sorted(unknown))}.")
+
+        for profile in profiles:
+            for writers in options['writers']:
+                with tempfile.TemporaryDirectory() as directory:
+                    path = os.path.join(directory, 'bench.sqlite3')
+                    db = sqlite3.connect(path)
+                    db.execute(SCHEMA)
+                    db.execute(INDEX)
+                    db.commit()
+                    db.close()
+                    self._report(profile, writers, options['duration'], lambda deadline, worker, results, lock: _sqlite_writer(
+                        path, settings.SQLITE_PROFILES[profile], deadline, worker, results, lock,
+                    ))
+
+    def _run_configured(self, options):
+        connection = connections['default']
+        id_column = 'id BIGSERIAL PRIMARY KEY' if connection.vendor == 'postgresql' else 'id INTEGER PRIMARY KEY'
+        with connection.cursor() as cursor:
+            cursor.execute(SCHEMA.replace('id INTEGER PRIMARY KEY', id_column))
+            cursor.execute(INDEX)
+        try:
+            for writers in options['writers']:
+                self._report(connection.vendor, writers, options['duration'], lambda deadline, worker, results, lock: _django_writer(
+                    'default', deadline, worker, results, lock,
+                ))
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute('DROP TABLE bench_registration')
+
+    def _report(self, label, writers, duration, target):
+        results = {'done': 0, 'errors': 0, 'latencies': []}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration
+        threads = [threading.Thread(target=target, args=(deadline, worker, results, lock)) for worker in range(writers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        latencies = sorted(results['latencies'])
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0
+        self.stdout.write(
+            f"{label:<14}{writers:>8}{results['done']:>10}{results['errors']:>8}"
+            f"{results['done'] / duration:>10.1f}{p99:>9.1f}"
+        )
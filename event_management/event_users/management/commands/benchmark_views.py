@@ -0,0 +1,117 @@
+import asyncio
+import resource
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+async def _run_connection(host, port, request_bytes, deadline, latencies, errors):
+    """One keep-alive connection sending requests back to back until the deadline."""
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+
+            started = time.perf_counter()
+            writer.write(request_bytes)
+            await writer.drain()
+
+            status = int((await reader.readline()).split()[1])
+            content_length, keep_alive = None, True
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.lower() == 'content-length':
+                    content_length = int(value)
+                elif name.lower() == 'connection' and value.strip().lower() == 'close':
+                    keep_alive = False
+
+            if content_length is None:
+                await reader.read()
+                keep_alive = False
+            else:
+                await reader.readexactly(content_length)
+
+            latencies.append(time.perf_counter() - started)
+            if status >= 400:
+                errors[0] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError):
+            errors[0] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.01)
+
+    if writer is not None:
+        writer.close()
+
+
+async def _run_load(url, token, connections, duration):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    request = f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nConnection: keep-alive\r\n'
+    if token:
+        request += f'Authorization: Bearer {token}\r\n'
+    request_bytes = (request + '\r\n').encode('latin-1')
+
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        _run_connection(parts.hostname, parts.port or 80, request_bytes, deadline, latencies, errors)
+        for _ in range(connections)
+    ))
+    return latencies, errors[0]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure throughput of an endpoint under concurrent keep-alive connections, "
+        "e.g. the sync views under gunicorn (WSGI) against the async views under uvicorn (ASGI)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target', action='append', required=True, metavar='NAME=BASE_URL',
+            help="Server to benchmark, repeatable: --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001",
+        )
+        parser.add_argument('--path', default='/api/events/available/')
+        parser.add_argument('--token', help="JWT access token sent as a Bearer token.")
+        parser.add_argument('--connections', type=int, nargs='+', default=[100, 1000])
+        parser.add_argument('--duration', type=float, default=10, help="Seconds per run.")
+
+    def handle(self, *args, **options):
+        # 1000 connections need more file descriptors than the usual default soft limit
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = max(options['connections']) + 100
+        if soft < wanted:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (min(wanted, hard), hard))
+
+        self.stdout.write(f"{'target':<10}{'conns':>8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p99 ms':>9}")
+        for target in options['target']:
+            name, sep, base_url = target.partition('=')
+            if not sep:
+                raise CommandError(f"Targets look like NAME=BASE_URL, got '{target}'.")
+
+            for connections in options['connections']:
+                latencies, errors = asyncio.run(_run_load(
+                    base_url.rstrip('/') + options['path'], options['token'], connections, options['duration'],
+                ))
+                if len(latencies) >= 2:
+                    cut_points = statistics.quantiles(latencies, n=100)
+                    p50, p99 = cut_points[49] * 1000, cut_points[98] * 1000
+                else:
+                    p50 = p99 = 0.0
+                self.stdout.write(
+                    f"{name:<10}{connections:>8}{len(latencies):>10}{errors:>8}"
+                    f"{len(latencies) / options['duration']:>10.1f}{p50:>9.1f}{p99:>9.1f}"
+                )
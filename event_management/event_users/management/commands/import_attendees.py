@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from event_users.imports import DEFAULT_CHUNK_SIZE, IMPORT_FORMATS, detect_format, import_attendees, write_error_report
+from event_users.models import Event
+
+
+class Command(BaseCommand):
+    help = "Bulk import attendees from a CSV or JSONL file, optionally registering them for an event."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV (username,email,password[,first_name,last_name]) or JSONL file.")
+        parser.add_argument('--format', choices=IMPORT_FORMATS, help="Defaults to the file extension.")
+        parser.add_argument('--event', type=int, help="Register every imported attendee for this event.")
+        parser.add_argument('--workers', type=int, help="Password hashing processes (defaults to the CPU count).")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--errors', help="Write the per-row error report to this CSV file.")
+
+    def handle(self, *args, **options):
+        event = None
+        if options['event']:
+            try:
+                event = Event.objects.get(pk=options['event'])
+            except Event.DoesNotExist:
+                raise CommandError(f"Event with ID {options['event']} does not exist.")
+
+        file_format = options['format'] or detect_format(options['path'])
+        with open(options['path'], newline='', encoding='utf-8') as stream:
+            report = import_attendees(
+                stream, file_format, event=event,
+                workers=options['workers'], chunk_size=options['chunk_size'],
+            )
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='', encoding='utf-8') as error_stream:
+                write_error_report(report['errors'], error_stream)
+        elif report['errors']:
+            write_error_report(report['errors'], sys.stderr)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {report['processed']} rows: {report['created']} created, "
+            f"{report['registered']} registered, {len(report['errors'])} errors "
+            f"in {report['elapsed_seconds']}s ({report['rows_per_second']} rows/s)."
+        ))
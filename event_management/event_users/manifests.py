@@ -0,0 +1,112 @@
+import base64
+import sys
+from array import array
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Max
+from django.utils.timezone import now
+
+from .audit import audit_many
+from .models import AuditLogEntry, OutboxEvent, Registration
+from .outbox import record_events
+
+
+MANIFEST_SALT = 'event_users.check_in_manifest'
+# Keeps each UPDATE ... IN (...) under SQLite's bound-parameter limit
+DELTA_BATCH_SIZE = 500
+
+
+def pack_ids(ids):
+    """Pack sorted ids into a base64 string of little-endian uint64 values."""
+    packed = array('Q', ids)
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def unpack_ids(data):
+    """Inverse of pack_ids; devices look ids up in the result with a binary search."""
+    packed = array('Q')
+    packed.frombytes(base64.b64decode(data))
+    if sys.byteorder != 'little':
+        packed.byteswap()
+    return packed
+
+
+def _signing_key():
+    return getattr(settings, 'CHECK_IN_MANIFEST_KEY', None) or settings.SECRET_KEY
+
+
+def manifest_version(event):
+    """
+    Id of the event's latest outbox row. Every registration, cancellation and
+    check-in writes one in the same transaction, so the version moves whenever
+    the manifest's contents do.
+    """
+    return OutboxEvent.objects.filter(event_id=event.id).aggregate(version=Max('id'))['version'] or 0
+
+
+def build_manifest(event):
+    """Return the signed attendee manifest for an event, built from one ordered query."""
+    # Read before the rows: a change in between makes the version look older, never newer
+    version = manifest_version(event)
+    attendees, checked_in = [], []
+    rows = Registration.objects.filter(event=event).order_by('user_id').values_list('user_id', 'checked_in')
+    for user_id, is_checked_in in rows.iterator():
+        attendees.append(user_id)
+        if is_checked_in:
+            checked_in.append(user_id)
+
+    payload = {
+        'event_id': event.id,
+        'version': version,
+        'generated_at': now().isoformat(),
+        'attendees': pack_ids(attendees),
+        'checked_in': pack_ids(checked_in),
+    }
+    return {
+        'event_id': event.id,
+        'version': version,
+        'attendee_count': len(attendees),
+        'checked_in_count': len(checked_in),
+        # zlib-compressed JSON payload with an HMAC signature
+        'manifest': signing.dumps(payload, key=_signing_key(), salt=MANIFEST_SALT, compress=True),
+    }
+
+
+def load_manifest(token):
+    """Verify a manifest token and return its payload; raises signing.BadSignature."""
+    return signing.loads(token, key=_signing_key(), salt=MANIFEST_SALT)
+
+
+def apply_check_in_delta(event, user_ids, actor_id=None):
+    """
+    Apply check-ins queued by door devices while offline.
+
+    The first check-in recorded wins: attendees already checked in are reported
+    back rather than treated as errors, and ids without a registration are rejected.
+    """
+    user_ids = sorted(set(user_ids))
+    checked_in, already_checked_in = [], []
+
+    with transaction.atomic():
+        for start in range(0, len(user_ids), DELTA_BATCH_SIZE):
+            batch = user_ids[start:start + DELTA_BATCH_SIZE]
+            pending = []
+            for user_id, is_checked_in in Registration.objects.filter(event=event, user_id__in=batch).values_list('user_id', 'checked_in'):
+                (already_checked_in if is_checked_in else pending).append(user_id)
+            Registration.objects.filter(event=event, user_id__in=pending, checked_in=False).update(checked_in=True)
+            record_events(OutboxEvent.CHECKED_IN, event.id, pending, source='offline')
+            audit_many(AuditLogEntry.CHECKED_IN, event.id, pending, actor_id=actor_id, source='offline')
+            checked_in.extend(pending)
+
+    known = set(checked_in) | set(already_checked_in)
+    rejected = [user_id for user_id in user_ids if user_id not in known]
+
+    return {
+        'checked_in': checked_in,
+        'already_checked_in': sorted(already_checked_in),
+        'rejected': rejected,
+    }
@@ -0,0 +1,168 @@
+import logging
+import math
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.http import JsonResponse
+
+
+logger = logging.getLogger(__name__)
+
+# Door staff keep checking people in while a ticket drop hammers the write endpoints
+CHECK_IN_ROUTES = {'check-in-for-event', 'check-in-manifest'}
+AUTH_ROUTES = {'register', 'login', 'token_refresh'}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class AIMDLimit:
+    """
+    Concurrency limit for one route group that adapts like TCP congestion control:
+    +1 while requests finish under the target latency and the limit is in use,
+    x backoff when one is slow or fails. Without `shed`, requests are only measured.
+    """
+
+    def __init__(self, name, initial=16, minimum=1, maximum=128, target_latency=0.5, backoff=0.9, shed=True):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.shed = shed
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.avg_latency = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.shed and self.in_flight >= int(self.limit):
+                self.rejected += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency, overloaded=False):
+        with self._lock:
+            in_flight = self.in_flight
+            self.in_flight -= 1
+            self.completed += 1
+            self.avg_latency = latency if self.completed == 1 else 0.9 * self.avg_latency + 0.1 * latency
+            if not self.shed:
+                return
+            if overloaded or latency > self.target_latency:
+                self.limit = max(self.minimum, self.limit * self.backoff)
+            elif in_flight * 2 >= self.limit:
+                # Only grow while the limit is actually being used, or it drifts up between bursts
+                self.limit = min(self.maximum, self.limit + 1)
+
+    def retry_after(self):
+        # Roughly the time for the requests in flight to drain
+        return max(1, math.ceil(self.avg_latency))
+
+    def state(self):
+        with self._lock:
+            return {
+                'limit': int(self.limit) if self.shed else None,
+                'in_flight': self.in_flight,
+                'completed': self.completed,
+                'rejected': self.rejected,
+                'avg_latency_ms': round(self.avg_latency * 1000, 1),
+            }
+
+
+_limits = {}
+_limits_lock = threading.Lock()
+
+
+def get_limit(group):
+    """The process-wide limiter for a route group; groups without configured limits are only measured."""
+    limit = _limits.get(group)
+    if limit is None:
+        with _limits_lock:
+            limit = _limits.get(group)
+            if limit is None:
+                config = getattr(settings, 'CONCURRENCY_LIMITS', {}).get(group)
+                limit = AIMDLimit(group, **config) if config else AIMDLimit(group, shed=False)
+                _limits[group] = limit
+    return limit
+
+
+def concurrency_state():
+    """Limiter state of this worker process, per route group, for monitoring."""
+    return {group: limit.state() for group, limit in sorted(_limits.items())}
+
+
+def route_group(request):
+    url_name = request.resolver_match.url_name if request.resolver_match else None
+    if url_name in CHECK_IN_ROUTES:
+        return 'check_in'
+    if url_name in AUTH_ROUTES:
+        return 'auth'
+    if request.method in SAFE_METHODS:
+        return 'read'
+    return 'write'
+
+
+class AdaptiveConcurrencyMiddleware:
+    """
+    Tracks in-flight requests and latency per route group and sheds requests over
+    the group's adaptive limit with 503 + Retry-After before the view (and its
+    database work) runs. Only groups listed in CONCURRENCY_LIMITS are shed, so
+    reads and check-ins keep flowing when registrations and logins back up.
+    State is per worker process, like the database connections it protects.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        # Under ASGI the stack stays async, so the native async views don't get pushed into a thread
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django would otherwise run a sync process_view in a thread for every request
+            self.process_view = self._aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        self._release(request, response)
+        return response
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        self._release(request, response)
+        return response
+
+    def _release(self, request, response):
+        slot = getattr(request, '_concurrency_slot', None)
+        if slot is not None:
+            limit, started = slot
+            # 500s here are mostly "database is locked" and lock timeouts: back off on them too
+            limit.release(time.monotonic() - started, overloaded=response.status_code >= 500)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        return self._acquire(request)
+
+    async def _aprocess_view(self, request, view_func, view_args, view_kwargs):
+        # No I/O involved: the bookkeeping runs inline on the event loop
+        return self._acquire(request)
+
+    def _acquire(self, request):
+        limit = get_limit(route_group(request))
+        if not limit.try_acquire():
+            retry_after = limit.retry_after()
+            logger.warning(f"Shedding {request.method} {request.path}: {limit.name} limit {int(limit.limit)} reached")
+            response = JsonResponse(
+                {'detail': 'The server is busy, please retry shortly.'}, status=503,
+            )
+            response['Retry-After'] = str(retry_after)
+            return response
+        request._concurrency_slot = (limit, time.monotonic())
+        return None
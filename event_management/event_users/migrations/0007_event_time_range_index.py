@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_users', '0006_archived_registration'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['start_time', 'end_time'], name='event_time_range_idx'),
+        ),
+    ]
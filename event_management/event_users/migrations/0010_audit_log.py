@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_users', '0009_event_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('registered', 'Registered'), ('checked_in', 'Checked in'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('source', models.CharField(default='api', max_length=20)),
+                ('registration_id', models.BigIntegerField(null=True)),
+                ('occurred_at', models.DateTimeField()),
+                ('actor', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('event', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='event_users.event')),
+                ('user', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', '-occurred_at'], name='audit_event_idx'), models.Index(fields=['user', '-occurred_at'], name='audit_user_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_users', '0010_audit_log'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlogentry',
+            name='audit_event_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlogentry',
+            name='audit_user_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(fields=['event', '-id'], name='audit_event_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlogentry',
+            index=models.Index(fields=['user', '-id'], name='audit_user_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:53
+
+import django.core.validators
+from django.db import migrations, models
+
+
+def fix_zero_intervals(apps, schema_editor):
+    # A step of 0 never advances, so the nightly materialization would never finish for these
+    EventSeries = apps.get_model('event_users', 'EventSeries')
+    EventSeries.objects.filter(interval=0).update(interval=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_users', '0011_audit_log_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='eventseries',
+            name='interval',
+            field=models.PositiveIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)]),
+        ),
+        migrations.RunPython(fix_zero_intervals, migrations.RunPython.noop),
+    ]
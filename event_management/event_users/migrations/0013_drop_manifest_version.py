@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-19 19:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('event_users', '0012_series_interval_min'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='event',
+            name='manifest_version',
+        ),
+    ]
@@ -1,6 +1,9 @@
 
 from django.db import models
 from django.contrib.auth.models import AbstractUser
+from django.core.validators import MaxValueValidator, MinValueValidator
+
+from .geo import encode_geohash
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
@@ -21,6 +24,43 @@ class CustomUser(AbstractUser):
         blank=True
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Role filtering in the user directory, walked in cursor (id) order
+            models.Index(fields=['role', 'id'], name='user_role_id_idx'),
+            # Prefix search on email (username is already indexed by its unique constraint)
+            models.Index(fields=['email'], name='user_email_idx'),
+        ]
+
+class ActiveEventManager(models.Manager):
+    """Hides soft-deleted events from every default query."""
+    def get_queryset(self):
+        return super().get_queryset().filter(is_deleted=False)
+
+
+class EventSeries(models.Model):
+    """A recurring event; its occurrences are materialized as Event rows over a rolling horizon."""
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    FREQUENCY_CHOICES = (
+        (DAILY, 'Daily'),
+        (WEEKLY, 'Weekly'),
+    )
+    organizer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='event_series')
+    title = models.CharField(max_length=255)
+    description = models.TextField()
+    location = models.CharField(max_length=255)
+    capacity = models.IntegerField()
+    # Recurrence rule: every `interval` days/weeks from `first_start`, until `until` (if set)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default=WEEKLY)
+    interval = models.PositiveIntegerField(default=1, validators=[MinValueValidator(1)])
+    first_start = models.DateTimeField()
+    duration = models.DurationField()
+    until = models.DateTimeField(null=True, blank=True)
+    # Start time of the last occurrence created so far
+    materialized_until = models.DateTimeField(null=True, blank=True)
+
+
 class Event(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField()
@@ -29,9 +69,119 @@ class Event(models.Model):
     location = models.CharField(max_length=255)
     capacity = models.IntegerField()
     organizer = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='events')  # Added this field
+    # Soft-delete state: the event is hidden at once and its registrations are purged in the background
+    is_deleted = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True)
+    series = models.ForeignKey(EventSeries, on_delete=models.SET_NULL, null=True, blank=True, related_name='occurrences')
+    # Optional venue coordinates for "events near me"; geohash is derived from them on save
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180), MaxValueValidator(180)])
+    geohash = models.CharField(max_length=12, blank=True, default='', editable=False)
+
+    objects = ActiveEventManager()
+    all_objects = models.Manager()  # Includes soft-deleted events (used by the purge task)
+
+    class Meta:
+        indexes = [
+            # Time range lookups: upcoming events and overlapping-registration checks
+            models.Index(fields=['start_time', 'end_time'], name='event_time_range_idx'),
+            # Nearby search: one range scan per geohash cell, start_time filtered inside the index
+            models.Index(fields=['geohash', 'start_time'], name='event_geohash_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
 
 class Registration(models.Model):
     user = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
     event = models.ForeignKey(Event, on_delete=models.CASCADE)
     registration_time = models.DateTimeField(auto_now_add=True)
     checked_in = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            # (event, user) lookups and the per-event attendee manifest ordered by user id
+            models.Index(fields=['event', 'user'], name='registration_event_user_idx'),
+        ]
+
+
+class ArchivedRegistration(models.Model):
+    """Cold copy of a registration for an event that ended long ago, moved out of the hot table."""
+    id = models.BigIntegerField(primary_key=True)  # Keeps the original registration id
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='+')
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='+')
+    registration_time = models.DateTimeField()
+    checked_in = models.BooleanField(default=False)
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['event', 'user'], name='archived_reg_event_user_idx'),
+        ]
+
+
+class OutboxEvent(models.Model):
+    """Append-only log of registration state changes, written in the same transaction as the change."""
+    REGISTERED = 'registration.created'
+    CHECKED_IN = 'registration.checked_in'
+    CANCELLED = 'registration.cancelled'
+    EVENT_TYPE_CHOICES = (
+        (REGISTERED, 'Registered'),
+        (CHECKED_IN, 'Checked in'),
+        (CANCELLED, 'Cancelled'),
+    )
+    event_type = models.CharField(max_length=50, choices=EVENT_TYPE_CHOICES)
+    # No database constraints: outbox rows must outlive purged events and deleted users
+    event = models.ForeignKey(Event, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    user = models.ForeignKey(CustomUser, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class WebhookSubscriber(models.Model):
+    """A CRM, badge printer or other consumer that receives outbox events as signed webhooks."""
+    name = models.CharField(max_length=255)
+    url = models.URLField()
+    secret = models.CharField(max_length=255)  # HMAC key used to sign each delivery
+    is_active = models.BooleanField(default=True)
+    # Id of the last outbox row delivered; the relay resumes from here through the primary key index
+    last_delivered_id = models.BigIntegerField(default=0)
+    failure_count = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+
+
+class AuditLogEntry(models.Model):
+    """Append-only record of who registered, checked in or cancelled and when; written behind in batches."""
+    REGISTERED = 'registered'
+    CHECKED_IN = 'checked_in'
+    CANCELLED = 'cancelled'
+    ACTION_CHOICES = (
+        (REGISTERED, 'Registered'),
+        (CHECKED_IN, 'Checked in'),
+        (CANCELLED, 'Cancelled'),
+    )
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    # No database constraints: the trail must outlive purged events and deleted users
+    event = models.ForeignKey(Event, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    user = models.ForeignKey(CustomUser, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+')
+    # Who performed the action when it was not the attendee (organizer, admin); null for self-service
+    actor = models.ForeignKey(CustomUser, on_delete=models.DO_NOTHING, db_constraint=False, null=True, related_name='+')
+    source = models.CharField(max_length=20, default='api')
+    registration_id = models.BigIntegerField(null=True)
+    # Set when the action happens, not when the buffered entry is flushed
+    occurred_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            # An event's or a user's history, newest first; ids follow write order and, unlike
+            # occurred_at (shared by a whole batch), are unique keys for cursor pagination
+            models.Index(fields=['event', '-id'], name='audit_event_idx'),
+            models.Index(fields=['user', '-id'], name='audit_user_idx'),
+        ]
@@ -0,0 +1,126 @@
+import hashlib
+import hmac
+import json
+import logging
+from datetime import timedelta
+from itertools import takewhile
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.utils.timezone import now
+
+from .models import OutboxEvent, WebhookSubscriber
+
+
+logger = logging.getLogger(__name__)
+
+
+def record_event(event_type, event_id, user_id, **payload):
+    """Append one outbox row; call inside the transaction that makes the change."""
+    return OutboxEvent.objects.create(event_type=event_type, event_id=event_id, user_id=user_id, payload=payload)
+
+
+def record_events(event_type, event_id, user_ids, **payload):
+    """Append one outbox row per user with a single bulk INSERT."""
+    return OutboxEvent.objects.bulk_create([
+        OutboxEvent(event_type=event_type, event_id=event_id, user_id=user_id, payload=payload)
+        for user_id in user_ids
+    ])
+
+
+def sign_body(secret, body):
+    return hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+
+def deliver_batch(subscriber, outbox_events):
+    """POST a batch of outbox rows to a subscriber; raises on network errors and non-2xx responses."""
+    body = json.dumps({
+        'deliveries': [
+            {
+                'id': outbox_event.id,
+                'type': outbox_event.event_type,
+                'event_id': outbox_event.event_id,
+                'user_id': outbox_event.user_id,
+                'payload': outbox_event.payload,
+                'created_at': outbox_event.created_at,
+            }
+            for outbox_event in outbox_events
+        ],
+    }, cls=DjangoJSONEncoder).encode('utf-8')
+
+    request = Request(subscriber.url, data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'X-Webhook-Signature': f'sha256={sign_body(subscriber.secret, body)}',
+        # Receivers dedupe on outbox ids, since a retried batch may arrive twice
+        'X-Webhook-Delivery': f'{outbox_events[0].id}-{outbox_events[-1].id}',
+    })
+    with urlopen(request, timeout=getattr(settings, 'WEBHOOK_TIMEOUT', 5)) as response:
+        if not 200 <= response.status < 300:
+            raise OSError(f"Webhook returned HTTP {response.status}")
+
+
+def relay_to_subscriber(subscriber, batch_size=None, max_batches=None):
+    """
+    Deliver pending outbox rows to one subscriber, in id order, starting after its cursor.
+
+    The cursor only moves forward after a successful delivery, so every event's
+    changes arrive in the order they happened. A failure stops the relay for
+    this subscriber and schedules a retry with exponential backoff.
+
+    Ids are handed out at INSERT but become visible at COMMIT, so on PostgreSQL a
+    lower id can appear after a higher one was relayed. Rows younger than
+    WEBHOOK_VISIBILITY_LAG seconds are left for the next run; a write transaction
+    that stays open longer than that can still be skipped.
+    """
+    batch_size = batch_size or getattr(settings, 'WEBHOOK_BATCH_SIZE', 100)
+    max_batches = max_batches or getattr(settings, 'WEBHOOK_MAX_BATCHES_PER_RUN', 10)
+    lag = timedelta(seconds=getattr(settings, 'WEBHOOK_VISIBILITY_LAG', 30))
+    subscribers = WebhookSubscriber.objects.filter(pk=subscriber.pk)
+    delivered = 0
+
+    for _ in range(max_batches):
+        cursor = subscriber.last_delivered_id
+        settled = now() - lag
+        pending = OutboxEvent.objects.filter(id__gt=cursor).order_by('id')[:batch_size]
+        # Stop at the first row that is too recent, so nothing behind it can be overtaken
+        batch = list(takewhile(lambda outbox_event: outbox_event.created_at <= settled, pending))
+        if not batch:
+            break
+
+        try:
+            deliver_batch(subscriber, batch)
+        except OSError as exc:
+            subscriber.failure_count += 1
+            backoff = min(
+                getattr(settings, 'WEBHOOK_BACKOFF_BASE', 10) * 2 ** (subscriber.failure_count - 1),
+                getattr(settings, 'WEBHOOK_BACKOFF_MAX', 3600),
+            )
+            subscriber.next_attempt_at = now() + timedelta(seconds=backoff)
+            subscribers.filter(last_delivered_id=cursor).update(
+                failure_count=F('failure_count') + 1, next_attempt_at=subscriber.next_attempt_at,
+            )
+            logger.error(f"Webhook delivery to {subscriber.name} failed ({exc}), retrying in {backoff}s")
+            break
+
+        # Conditional on the cursor we started from: an overlapping run that got further wins
+        if not subscribers.filter(last_delivered_id=cursor).update(
+            last_delivered_id=batch[-1].id, failure_count=0, next_attempt_at=None,
+        ):
+            logger.warning(f"Webhook cursor of {subscriber.name} moved by another relay run, stopping")
+            break
+        subscriber.last_delivered_id = batch[-1].id
+        subscriber.failure_count = 0
+        subscriber.next_attempt_at = None
+        delivered += len(batch)
+
+        if len(batch) < batch_size:
+            break
+
+    return delivered
+
+
+def due_subscribers():
+    """Active subscribers that are not waiting out a retry backoff."""
+    return WebhookSubscriber.objects.filter(is_active=True).exclude(next_attempt_at__gt=now())
@@ -0,0 +1,90 @@
+import csv
+import shutil
+
+from django.core.files.storage import default_storage
+
+from .models import ArchivedRegistration, Registration
+
+
+REPORT_FORMATS = ('csv', 'parquet', 'arrow')
+PARTITION_COLUMNS = ['Event ID', 'Event Title', 'User ID', 'Username', 'Registration Time', 'Checked In']
+
+
+def iter_registration_rows(event):
+    """(user id, username, registration time, checked in) for an event's attendees, hot and archived."""
+    for model in (Registration, ArchivedRegistration):
+        rows = model.objects.filter(event=event, user__role='Attendee').order_by('id').values_list(
+            'user_id', 'user__username', 'registration_time', 'checked_in'
+        )
+        yield from rows.iterator()
+
+
+def write_partition(event, stream):
+    """Write one event's rows as a CSV partition; returns (row count, checked-in count)."""
+    writer = csv.writer(stream)
+    writer.writerow(PARTITION_COLUMNS)
+    rows = checked_in = 0
+    for user_id, username, registration_time, is_checked_in in iter_registration_rows(event):
+        writer.writerow([event.id, event.title, user_id, username, registration_time.isoformat(), is_checked_in])
+        rows += 1
+        checked_in += is_checked_in
+    return rows, checked_in
+
+
+def merge_csv_partitions(partition_paths, output):
+    """Concatenate CSV partitions into `output` (binary), keeping only the first header."""
+    output.write((','.join(PARTITION_COLUMNS) + '\r\n').encode('utf-8'))
+    for path in partition_paths:
+        with default_storage.open(path, 'rb') as partition:
+            partition.readline()  # Skip the partition's own header
+            shutil.copyfileobj(partition, output)
+
+
+def merge_columnar_partitions(partition_paths, output, output_format):
+    """Merge CSV partitions into one Parquet or Arrow IPC file; needs the optional pyarrow package."""
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow reports need the 'pyarrow' package installed.")
+
+    schema = pa.schema([
+        ('Event ID', pa.int64()),
+        ('Event Title', pa.string()),
+        ('User ID', pa.int64()),
+        ('Username', pa.string()),
+        ('Registration Time', pa.timestamp('us', tz='UTC')),
+        ('Checked In', pa.bool_()),
+    ])
+    convert_options = pa_csv.ConvertOptions(column_types=schema)
+
+    tables = []
+    for path in partition_paths:
+        with default_storage.open(path, 'rb') as partition:
+            tables.append(pa_csv.read_csv(partition, convert_options=convert_options))
+    table = pa.concat_tables(tables) if tables else schema.empty_table()
+
+    if output_format == 'parquet':
+        pq.write_table(table, output, compression='zstd')
+    else:
+        with pa.ipc.new_file(output, table.schema) as writer:
+            writer.write_table(table)
+
+
+def summarize_partitions(partitions, elapsed_seconds):
+    """Totals across partitions, plus how the parallel run compares with running them one after another."""
+    total_rows = sum(partition['rows'] for partition in partitions)
+    total_checked_in = sum(partition['checked_in'] for partition in partitions)
+    sequential_seconds = sum(partition['seconds'] for partition in partitions)
+    return {
+        'events': len(partitions),
+        'registrations': total_rows,
+        'checked_in': total_checked_in,
+        'check_in_rate': round(total_checked_in / total_rows, 4) if total_rows else 0,
+        'largest_event': max(partitions, key=lambda partition: partition['rows'])['event_id'] if partitions else None,
+        'elapsed_seconds': round(elapsed_seconds, 3),
+        'sequential_seconds': round(sequential_seconds, 3),
+        'speedup': round(sequential_seconds / elapsed_seconds, 2) if elapsed_seconds else None,
+        'rows_per_second': round(total_rows / elapsed_seconds, 1) if elapsed_seconds else None,
+    }
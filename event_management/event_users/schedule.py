@@ -0,0 +1,25 @@
+import heapq
+from collections import defaultdict
+
+
+def find_conflicts(intervals):
+    """
+    Map each key to the keys of the intervals it overlaps, for (key, start, end) tuples.
+
+    Sweeps the intervals in start order while keeping the ones still running in a
+    min-heap on end time: O(n log n + k) for k overlapping pairs, instead of
+    comparing every pair. Intervals that only touch (one ends as the next starts)
+    do not conflict.
+    """
+    conflicts = defaultdict(list)
+    active = []  # (end, key) of intervals that started and have not ended yet
+
+    for key, start, end in sorted(intervals, key=lambda interval: interval[1]):
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+        for _, other_key in active:
+            conflicts[key].append(other_key)
+            conflicts[other_key].append(key)
+        heapq.heappush(active, (end, key))
+
+    return conflicts
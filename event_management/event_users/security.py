@@ -0,0 +1,133 @@
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+
+
+def get_redis():
+    """Shared Redis client for the token blacklist and rate limiting (connects lazily)."""
+    global _redis_client
+    if _redis_client is None:
+        # Imported on first use, so workers that never serve an auth request don't load the client
+        import redis
+        _redis_client = redis.Redis.from_url(settings.AUTH_REDIS_URL)
+    return _redis_client
+
+
+class TokenStoreUnavailable(APIException):
+    """The Redis blacklist can't be reached: refresh fails closed rather than skipping the check."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Token refresh is temporarily unavailable, please retry shortly.'
+    default_code = 'token_store_unavailable'
+
+
+def _blacklist_key(jti):
+    return f'jwt:blacklist:{jti}'
+
+
+def _remaining_lifetime(token):
+    # Blacklist entries expire together with the token, so the blacklist never outgrows live tokens
+    return max(int(token['exp'] - time.time()), 1)
+
+
+def blacklist_token(token):
+    """
+    Blacklist a token until it expires. Returns False if it was already blacklisted,
+    which makes claiming a refresh token for rotation a single atomic SET NX.
+    """
+    return bool(get_redis().set(_blacklist_key(token['jti']), 1, ex=_remaining_lifetime(token), nx=True))
+
+
+def is_blacklisted(token):
+    return bool(get_redis().exists(_blacklist_key(token['jti'])))
+
+
+class RedisSlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding-window log throttle kept in a Redis sorted set, so limits hold across
+    every web worker. Rates come from REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+    """
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        from redis import RedisError
+
+        current = time.time()
+        try:
+            pipe = get_redis().pipeline()
+            pipe.zremrangebyscore(self.key, 0, current - self.duration)
+            pipe.zadd(self.key, {f'{current}:{uuid.uuid4().hex}': current})
+            pipe.zcard(self.key)
+            pipe.zrange(self.key, 0, 0, withscores=True)
+            pipe.expire(self.key, self.duration)
+            _, _, count, oldest, _ = pipe.execute()
+        except RedisError as exc:
+            # Fail open: an unavailable limiter must not lock everyone out of logging in
+            logger.warning(f"Rate limiter unavailable, allowing request: {exc}")
+            return True
+
+        if count > self.num_requests:
+            self.retry_after = oldest[0][1] + self.duration - current if oldest else self.duration
+            return False
+        return True
+
+    def wait(self):
+        return getattr(self, 'retry_after', None)
+
+
+class LoginUsernameThrottle(RedisSlidingWindowThrottle):
+    scope = 'login_username'
+
+    def get_cache_key(self, request, view):
+        username = request.data.get('username')
+        if not username:
+            return None
+        return f'throttle:{self.scope}:{str(username).lower()}'
+
+
+class LoginIPThrottle(RedisSlidingWindowThrottle):
+    scope = 'login_ip'
+
+    def get_cache_key(self, request, view):
+        return f'throttle:{self.scope}:{self.get_ident(request)}'
+
+
+class TokenRefreshUserThrottle(RedisSlidingWindowThrottle):
+    scope = 'token_refresh_user'
+
+    def get_cache_key(self, request, view):
+        raw_token = request.data.get('refresh')
+        if not raw_token:
+            return None
+        try:
+            # Only the claim is needed here; the serializer does the real verification
+            token = RefreshToken(raw_token, verify=False)
+        except TokenError:
+            return None
+        user_id = token.payload.get(api_settings.USER_ID_CLAIM)
+        return f'throttle:{self.scope}:{user_id}' if user_id is not None else None
+
+
+class TokenRefreshIPThrottle(RedisSlidingWindowThrottle):
+    scope = 'token_refresh_ip'
+
+    def get_cache_key(self, request, view):
+        return f'throttle:{self.scope}:{self.get_ident(request)}'
@@ -1,6 +1,16 @@
+import logging
+
 
 from rest_framework import serializers
-from .models import CustomUser, Event, Registration
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .archive import registered_count
+from .models import AuditLogEntry, CustomUser, Event, EventSeries, Registration
+from .security import TokenStoreUnavailable, blacklist_token, is_blacklisted
+
+logger = logging.getLogger(__name__)
 
 class CustomUserSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -8,7 +18,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CustomUser
-        fields = ['username', 'password', 'role', 'email']
+        fields = ['id', 'username', 'password', 'role', 'email']
 
     def create(self, validated_data):
         user = CustomUser(
@@ -27,14 +37,50 @@ class EventSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Event
-        fields = ['id', 'title', 'description', 'start_time', 'end_time', 'organizer', 'capacity', 'available_capacity']  # Include capacity-related fields
+        fields = ['id', 'title', 'description', 'start_time', 'end_time', 'organizer', 'capacity', 'available_capacity',
+                  'latitude', 'longitude']  # Include capacity-related fields
+
+    def validate(self, attrs):
+        latitude = attrs.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = attrs.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError('Latitude and longitude must be set together.')
+        return attrs
 
     def get_available_capacity(self, obj):
-        # Calculate remaining capacity
-        total_registered = Registration.objects.filter(event=obj).count()
+        # Calculate remaining capacity, reusing the count when the queryset annotated it
+        total_registered = getattr(obj, 'registered_count', None)
+        if total_registered is None:
+            total_registered = registered_count(obj)
         return obj.capacity - total_registered  # Remaining spots available
 
 
+# Event Series Serializer
+class EventSeriesSerializer(serializers.ModelSerializer):
+    RECURRENCE_FIELDS = ('frequency', 'interval', 'first_start', 'duration')
+
+    class Meta:
+        model = EventSeries
+        fields = ['id', 'title', 'description', 'location', 'capacity', 'frequency', 'interval',
+                  'first_start', 'duration', 'until', 'organizer', 'materialized_until']
+        read_only_fields = ['organizer', 'materialized_until']
+
+    def validate(self, attrs):
+        # Occurrences already exist for the current rule, so it cannot be edited in place
+        if self.instance is not None:
+            changed = [field for field in self.RECURRENCE_FIELDS if field in attrs and attrs[field] != getattr(self.instance, field)]
+            if changed:
+                raise serializers.ValidationError(f"The recurrence ({', '.join(changed)}) cannot be changed; create a new series instead.")
+        return attrs
+
+
+# Audit Log Entry Serializer
+class AuditLogEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLogEntry
+        fields = ['id', 'action', 'event', 'user', 'actor', 'source', 'registration_id', 'occurred_at']
+
+
 # Registration Serializer
 class RegistrationSerializer(serializers.ModelSerializer):
     event_title = serializers.ReadOnlyField(source='event.title')  # Display event title in registration
@@ -57,3 +103,27 @@ class RegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Event is full.")
 
         return super().create(validated_data)
+
+
+# Refresh serializer backed by the Redis blacklist
+class RedisTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # The token is only claimed once it has been verified and its user is still active
+        data = super().validate(attrs)
+        refresh = RefreshToken(attrs['refresh'])
+
+        from redis import RedisError
+
+        try:
+            if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+                # Claim the token atomically: a second refresh with the same token is rejected
+                claimed = blacklist_token(refresh)
+            else:
+                claimed = not is_blacklisted(refresh)
+        except RedisError as exc:
+            logger.error(f"Token blacklist unavailable, refusing refresh: {exc}")
+            raise TokenStoreUnavailable() from exc
+
+        if not claimed:
+            raise TokenError('Token is blacklisted')
+        return data
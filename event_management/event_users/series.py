@@ -0,0 +1,85 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.timezone import now
+
+from .models import Event, EventSeries
+
+
+# Fields edited on a series that are copied onto its future occurrences
+SERIES_EVENT_FIELDS = ('title', 'description', 'location', 'capacity')
+
+
+def _step(series):
+    days = series.interval * (7 if series.frequency == EventSeries.WEEKLY else 1)
+    return timedelta(days=days)
+
+
+def occurrence_starts(series, horizon):
+    """Start times of the upcoming occurrences not yet materialized, up to `horizon`."""
+    step = _step(series)
+    start = series.materialized_until + step if series.materialized_until else series.first_start
+    end = min(horizon, series.until) if series.until else horizon
+    current = now()
+    while start <= end:
+        # A series may be created with a start date in the past; those occurrences are skipped
+        if start > current:
+            yield start
+        start += step
+
+
+def materialize_series(series, horizon_days=None):
+    """Create the series' occurrences up to the rolling horizon with one bulk INSERT."""
+    horizon_days = horizon_days or getattr(settings, 'EVENT_SERIES_HORIZON_DAYS', 90)
+    starts = list(occurrence_starts(series, now() + timedelta(days=horizon_days)))
+    if not starts:
+        return []
+
+    with transaction.atomic():
+        events = Event.objects.bulk_create([
+            Event(
+                series=series,
+                organizer_id=series.organizer_id,
+                title=series.title,
+                description=series.description,
+                location=series.location,
+                capacity=series.capacity,
+                start_time=start,
+                end_time=start + series.duration,
+            )
+            for start in starts
+        ])
+        series.materialized_until = starts[-1]
+        series.save(update_fields=['materialized_until'])
+    return events
+
+
+def truncate_series(series):
+    """
+    Soft-delete the upcoming occurrences past a shortened `until` and move
+    materialized_until back to the last start the rule still allows, so a later
+    extension recreates them. Returns the ids of the removed occurrences.
+    """
+    if series.until is None or series.materialized_until is None or series.materialized_until <= series.until:
+        return []
+
+    removed = series.occurrences.filter(start_time__gt=max(series.until, now()))
+    event_ids = list(removed.values_list('id', flat=True))
+    Event.objects.filter(id__in=event_ids).update(is_deleted=True, deleted_at=now())
+
+    if series.until < series.first_start:
+        series.materialized_until = None
+    else:
+        step = _step(series)
+        series.materialized_until = series.first_start + (series.until - series.first_start) // step * step
+    series.save(update_fields=['materialized_until'])
+    return event_ids
+
+
+def propagate_series_changes(series, changed_fields):
+    """Apply series edits to every future occurrence with a single set-based UPDATE."""
+    changes = {field: getattr(series, field) for field in SERIES_EVENT_FIELDS if field in changed_fields}
+    if not changes:
+        return 0
+    return series.occurrences.filter(start_time__gt=now()).update(**changes)
@@ -2,14 +2,31 @@
 from datetime import timedelta
 from event_management.celery import celery_task
 import csv
-from io import StringIO
+from io import StringIO, TextIOWrapper
+from concurrent.futures import ThreadPoolExecutor
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from .models import Registration, Event
+from .models import Registration, Event, ArchivedRegistration, EventSeries, AuditLogEntry
+from .series import materialize_series
+from django.db.models import Q
 import logging
 from django.core.mail import send_mail
 from celery import shared_task
 from django.utils.timezone import now
+from django.conf import settings
+from django.db import router
+from .imports import import_attendees, write_error_report
+from .outbox import due_subscribers, relay_to_subscriber
+from .archive import archive_past_registrations
+from itertools import chain
+from .reports import merge_columnar_partitions, merge_csv_partitions, summarize_partitions, write_partition
+from celery import chord, group
+from celery.signals import worker_process_shutdown
+from .audit import audit_buffer, deserialize_entry
+from django.core.files import File
+import json
+import tempfile
+import time
 
 
 
@@ -29,9 +46,10 @@ def generate_registration_report(self, event_id):
         logger.error(f"Event with ID {event_id} does not exist.")
         return {'error': 'Event not found.'}
 
-    # Get all registrations where the user's role is 'Attendee'
-    registrations = Registration.objects.filter(event=event, user__role='Attendee')
-    logger.info(f"Found {registrations.count()} registrations for event: {event.title}")
+    # Get all registrations where the user's role is 'Attendee', including archived ones
+    registrations = Registration.objects.filter(event=event, user__role='Attendee').select_related('user')
+    archived_registrations = ArchivedRegistration.objects.filter(event=event, user__role='Attendee').select_related('user')
+    logger.info(f"Found {registrations.count() + archived_registrations.count()} registrations for event: {event.title}")
 
     # Initialize the CSV output
     output = StringIO()         #create an in-memory file-like object where the CSV data will be stored.
@@ -39,7 +57,7 @@ def generate_registration_report(self, event_id):
     writer.writerow(['User ID', 'Username', 'Registration Time', 'Checked In'])
 
     # Write registration data to CSV
-    for registration in registrations:
+    for registration in chain(registrations, archived_registrations):
         writer.writerow([
             registration.user.id,
             registration.user.username,
@@ -66,6 +84,64 @@ def generate_registration_report(self, event_id):
     }
 
 
+@shared_task
+def generate_event_report_partition(event_id, job_id):
+    """Write one event's registrations as a CSV partition of a combined report."""
+    started = time.perf_counter()
+    event = Event.objects.get(id=event_id)
+
+    output = StringIO()
+    rows, checked_in = write_partition(event, output)
+    path = default_storage.save(
+        f'reports/combined/{job_id}/event_{event_id}.csv', ContentFile(output.getvalue().encode('utf-8'))
+    )
+    return {
+        'event_id': event_id,
+        'path': path,
+        'rows': rows,
+        'checked_in': checked_in,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+@shared_task
+def merge_report_partitions(partitions, job_id, output_format, started_at):
+    """Chord callback: merge the per-event partitions into one report plus a summary file."""
+    partitions = sorted(partitions, key=lambda partition: partition['event_id'])
+    partition_paths = [partition['path'] for partition in partitions]
+
+    with tempfile.TemporaryFile() as merged:
+        if output_format == 'csv':
+            merge_csv_partitions(partition_paths, merged)
+        else:
+            merge_columnar_partitions(partition_paths, merged, output_format)
+        merged.seek(0)
+        report_path = default_storage.save(f'reports/combined/{job_id}.{output_format}', File(merged))
+
+    for path in partition_paths:
+        default_storage.delete(path)
+
+    summary = summarize_partitions(partitions, time.time() - started_at)
+    summary['report_path'] = report_path
+    summary['per_event'] = [{key: partition[key] for key in ('event_id', 'rows', 'checked_in')} for partition in partitions]
+    summary_path = default_storage.save(
+        f'reports/combined/{job_id}_summary.json', ContentFile(json.dumps(summary, indent=2).encode('utf-8'))
+    )
+    logger.info(
+        f"Combined report {job_id}: {summary['registrations']} rows from {summary['events']} events "
+        f"in {summary['elapsed_seconds']}s ({summary['speedup']}x vs sequential)"
+    )
+    return {'report_path': report_path, 'summary_path': summary_path, **summary}
+
+
+def start_combined_report(event_ids, job_id, output_format='csv'):
+    """Fan out one partition task per event and merge them with a chord."""
+    return chord(
+        group(generate_event_report_partition.s(event_id, job_id) for event_id in event_ids),
+        merge_report_partitions.s(job_id, output_format, time.time()),
+    ).apply_async()
+
+
 @shared_task
 def send_event_registration_email(recipient_email, event_name):
     logger.info(f"Sending email to {recipient_email} for event {event_name}")
@@ -79,6 +155,141 @@ def send_event_registration_email(recipient_email, event_name):
 
 
 
+@shared_task(bind=True)
+def purge_deleted_event(self, event_id, batch_size=None):
+    """Delete a soft-deleted event's registrations in bounded batches, then the event itself."""
+    batch_size = batch_size or getattr(settings, 'EVENT_PURGE_BATCH_SIZE', 1000)
+
+    event = Event.all_objects.filter(id=event_id, is_deleted=True).first()
+    if event is None:
+        logger.error(f"Soft-deleted event with ID {event_id} does not exist.")
+        return {'error': 'Event not found.'}
+
+    using = router.db_for_write(Registration)
+    total = (
+        Registration.objects.filter(event_id=event_id).count()
+        + ArchivedRegistration.objects.filter(event_id=event_id).count()
+    )
+    deleted = 0
+
+    # Archived registrations are purged the same way as the hot ones
+    for model in (Registration, ArchivedRegistration):
+        registrations = model.objects.filter(event_id=event_id)
+        while True:
+            # Only the primary keys of one batch are loaded, never the full rows
+            batch_ids = list(registrations.values_list('id', flat=True)[:batch_size])
+            if not batch_ids:
+                break
+
+            # _raw_delete issues a single DELETE without collecting related objects
+            deleted += model.objects.filter(id__in=batch_ids)._raw_delete(using)
+            self.update_state(state='PROGRESS', meta={'event_id': event_id, 'deleted': deleted, 'total': total})
+            logger.info(f"Purged {deleted}/{total} registrations for event_id: {event_id}")
+
+    # No registrations are left, so the cascade has nothing to collect
+    event.delete()
+    logger.info(f"Event {event_id} purged after removing {deleted} registrations")
+
+    return {
+        'message': 'Event purged successfully!',
+        'event_id': event_id,
+        'deleted_registrations': deleted,
+    }
+
+
+@shared_task
+def import_attendees_file(file_path, file_format, event_id=None):
+    """Import an uploaded attendee file and save its per-row error report next to the other reports."""
+    logger.info(f"Starting attendee import from {file_path}")
+    event = Event.objects.filter(id=event_id).first() if event_id else None
+
+    # Celery's prefork children cannot start a process pool, but PBKDF2 releases
+    # the GIL, so a thread pool still hashes passwords in parallel here
+    try:
+        with default_storage.open(file_path, 'rb') as uploaded:
+            stream = TextIOWrapper(uploaded, encoding='utf-8', newline='')
+            report = import_attendees(stream, file_format, event=event, executor_class=ThreadPoolExecutor)
+    finally:
+        # The upload holds plaintext passwords: it goes whether or not the import succeeded
+        default_storage.delete(file_path)
+
+    result = {key: value for key, value in report.items() if key != 'errors'}
+    result['error_count'] = len(report['errors'])
+    if report['errors']:
+        output = StringIO()
+        write_error_report(report['errors'], output)
+        result['error_report_path'] = default_storage.save(
+            'reports/attendee_import_errors.csv', ContentFile(output.getvalue().encode('utf-8'))
+        )
+
+    logger.info(f"Attendee import finished: {result}")
+    return result
+
+
+@shared_task
+def purge_stale_imports():
+    """Delete attendee uploads left behind by import tasks that were killed or never ran."""
+    cutoff = now() - timedelta(hours=getattr(settings, 'IMPORT_UPLOAD_MAX_AGE_HOURS', 6))
+    if not default_storage.exists('imports'):
+        return 0
+    _, file_names = default_storage.listdir('imports')
+    stale = [f'imports/{name}' for name in file_names if default_storage.get_modified_time(f'imports/{name}') < cutoff]
+    for file_path in stale:
+        default_storage.delete(file_path)
+        logger.warning(f"Deleted stale attendee upload {file_path}")
+    return len(stale)
+
+
+@shared_task
+def relay_outbox():
+    """Deliver new outbox rows to every webhook subscriber that is due."""
+    delivered = {}
+    for subscriber in due_subscribers():
+        delivered[subscriber.name] = relay_to_subscriber(subscriber)
+    return delivered
+
+
+@shared_task
+def write_audit_entries(entries):
+    """Bulk-insert a batch of audit entries handed over by a web process (AUDIT_LOG_WRITER = 'celery')."""
+    AuditLogEntry.objects.bulk_create([deserialize_entry(entry) for entry in entries], batch_size=500)
+    return len(entries)
+
+
+@worker_process_shutdown.connect
+def flush_audit_log(**kwargs):
+    # Prefork children exit without running atexit handlers, so flush what their tasks audited here
+    audit_buffer.flush()
+
+
+@shared_task
+def archive_registrations(days=None):
+    """Move registrations of long-finished events into the archive table to keep the hot table small."""
+    archived = archive_past_registrations(days)
+    logger.info(f"Archived registrations for {len(archived)} events")
+    return {'archived': archived}
+
+
+@shared_task
+def materialize_event_series():
+    """Extend every open-ended or still running series up to the rolling horizon."""
+    created = 0
+    for series in EventSeries.objects.filter(Q(until__isnull=True) | Q(until__gt=now())):
+        created += len(materialize_series(series))
+    logger.info(f"Materialized {created} event series occurrences")
+    return {'created': created}
+
+
+@shared_task
+def purge_deleted_events():
+    """Re-enqueue purges for soft-deleted events whose purge task never finished."""
+    # Recent deletions are left alone, so a purge still working through its batches isn't queued twice
+    cutoff = now() - timedelta(minutes=getattr(settings, 'EVENT_PURGE_GRACE_MINUTES', 60))
+    stale = Event.all_objects.filter(Q(deleted_at__lt=cutoff) | Q(deleted_at__isnull=True), is_deleted=True)
+    for event_id in stale.values_list('id', flat=True):
+        purge_deleted_event.delay(event_id)
+
+
 # event_users
 
 @shared_task
@@ -86,7 +297,7 @@ def send_event_reminder():
     """Send reminder emails to attendees 1 day before the event starts."""
 
     one_day_ago = now() + timedelta(days=1)
-    upcoming_events = Registration.objects.filter(event__start_time__date=one_day_ago)
+    upcoming_events = Registration.objects.filter(event__start_time__date=one_day_ago, event__is_deleted=False)
 
     for registration in upcoming_events:
         send_mail(
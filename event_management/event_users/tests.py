@@ -1,3 +1,807 @@
-from django.test import TestCase
+import csv
+import hashlib
+import hmac
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib import admin
+from asgiref.sync import iscoroutinefunction
+from django.http import HttpResponse
+from django.core import signing
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, connection, transaction
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from redis import RedisError
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+from django.urls import path, reverse
+from django.utils.timezone import now
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .admin import EventAdmin
+from .archive import archive_event_registrations
+from .async_views import AsyncEventDetailView
+from .reports import PARTITION_COLUMNS, merge_columnar_partitions, merge_csv_partitions, write_partition
+from .geo import EARTH_RADIUS_KM, bounding_box, covering_cells, encode_geohash, nearby_events
+from .manifests import load_manifest, pack_ids, unpack_ids
+from .tickets import InvalidTicket, issue_ticket, verify_ticket
+from .audit import AuditBuffer, audit, audit_buffer
+from .middleware import AdaptiveConcurrencyMiddleware, get_limit
+from .models import AuditLogEntry, CustomUser, Event, EventSeries, OutboxEvent, Registration, WebhookSubscriber
+from .outbox import record_events, relay_to_subscriber
+from .security import TokenStoreUnavailable
+from .schedule import find_conflicts
+from .serializers import RedisTokenRefreshSerializer
+from .tasks import import_attendees_file, purge_deleted_events, purge_stale_imports
 
 # Create your tests here.
+
+# The async event route on its own, as urls.py mounts it when USE_ASYNC_VIEWS is on
+urlpatterns = [
+    path('api/events/<int:pk>/', AsyncEventDetailView.as_view(), name='event-detail'),
+]
+
+
+class StartupImportTimeTest(SimpleTestCase):
+    """
+    Cold-start budget for web workers: loads wsgi.application and the URLconf in a
+    fresh interpreter under `-X importtime`. The budget can be raised for slow CI
+    machines with IMPORT_TIME_BUDGET_MS.
+    """
+    budget_ms = int(os.getenv('IMPORT_TIME_BUDGET_MS', 1500))
+    # Modules only a Celery worker needs; the web process imports them on first use
+    worker_only_modules = ('event_users.tasks', 'event_users.imports', 'redis')
+
+    script = (
+        'from event_management.wsgi import application\n'
+        'from django.urls import get_resolver\n'
+        'get_resolver().url_patterns\n'
+    )
+
+    def _import_times(self):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='event_management.settings')
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', self.script],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        # Lines look like "import time:  self [us] | cumulative | <indent>module"
+        times = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, module = line[len('import time:'):].split('|')
+            times[module.rstrip()] = int(cumulative)
+        return times
+
+    def test_startup_within_budget(self):
+        times = self._import_times()
+        # Top-level imports are unindented; their cumulative times add up to the whole startup
+        total_ms = sum(us for module, us in times.items() if not module.startswith('  ')) / 1000
+        self.assertLess(total_ms, self.budget_ms, f'Web worker startup imports took {total_ms:.0f} ms.')
+
+    def test_worker_only_modules_are_not_imported(self):
+        imported = {module.strip() for module in self._import_times()}
+        for module in self.worker_only_modules:
+            self.assertFalse(module in imported, f'{module} is imported when a web worker starts.')
+
+
+class SQLiteImmediateTransactionTest(TransactionTestCase):
+    """Writers on SQLite take the write lock at BEGIN, on every supported Django version."""
+
+    def test_atomic_begins_immediate(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('SQLite only')
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Event.objects.count()
+        self.assertEqual(queries.captured_queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+
+@override_settings(ROOT_URLCONF='event_users.tests')
+class AsyncEventWriteDelegationTest(TestCase):
+    """Writes on the async event route are handed to the sync viewset, with CSRF enforced as in production."""
+
+    def setUp(self):
+        self.organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.event = Event.objects.create(
+            title='Launch', description='', location='Hall A', capacity=10, organizer=self.organizer,
+            start_time=now() + timedelta(days=1), end_time=now() + timedelta(days=1, hours=2),
+        )
+        self.headers = {'Authorization': f'Bearer {RefreshToken.for_user(self.organizer).access_token}'}
+
+    async def test_put_with_bearer_token_is_not_csrf_checked(self):
+        client = AsyncClient(enforce_csrf_checks=True)
+        response = await client.put(
+            f'/api/events/{self.event.pk}/',
+            {
+                'title': 'Launch (moved)', 'description': 'Product launch', 'location': 'Hall B', 'capacity': 20,
+                'start_time': self.event.start_time.isoformat(), 'end_time': self.event.end_time.isoformat(),
+            },
+            content_type='application/json',
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        await self.event.arefresh_from_db()
+        self.assertEqual(self.event.title, 'Launch (moved)')
+
+    async def test_get_is_served_by_the_async_view(self):
+        response = await AsyncClient(enforce_csrf_checks=True).get(f'/api/events/{self.event.pk}/', headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['title'], 'Launch')
+
+
+class RedisTokenRefreshSerializerTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('attendee', password='secret', role='Attendee')
+
+    def _validate(self):
+        serializer = RedisTokenRefreshSerializer(data={'refresh': str(RefreshToken.for_user(self.user))})
+        return serializer.is_valid(raise_exception=True)
+
+    @mock.patch('event_users.serializers.blacklist_token')
+    def test_token_of_inactive_user_is_not_claimed(self, blacklist_token):
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self._validate()
+        blacklist_token.assert_not_called()
+
+    @mock.patch('event_users.serializers.blacklist_token', side_effect=RedisError('connection refused'))
+    def test_unreachable_blacklist_fails_closed_with_503(self, blacklist_token):
+        with self.assertRaises(TokenStoreUnavailable) as raised:
+            self._validate()
+        self.assertEqual(raised.exception.status_code, 503)
+
+
+class ArchivedCapacityTest(TestCase):
+    """Capacity figures keep counting registrations after they move to the archive table."""
+
+    def setUp(self):
+        self.organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.event = Event.objects.create(
+            title='Last year', description='', location='Hall A', capacity=10, organizer=self.organizer,
+            start_time=now() - timedelta(days=60), end_time=now() - timedelta(days=60, hours=-2),
+        )
+        for index in range(3):
+            attendee = CustomUser.objects.create_user(f'attendee{index}', password='secret', role='Attendee')
+            Registration.objects.create(event=self.event, user=attendee, checked_in=index == 0)
+        archive_event_registrations(self.event)
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+
+    def test_capacity_status(self):
+        response = self.client.get(reverse('capacity-status', args=[self.event.pk]))
+        self.assertEqual(response.data['registered_count'], 3)
+        self.assertEqual(response.data['remaining_capacity'], 7)
+
+    def test_capacity_overview(self):
+        [row] = self.client.get(reverse('capacity-overview')).data
+        self.assertEqual((row['registered_count'], row['remaining_capacity'], row['checked_in_count']), (3, 7, 1))
+
+    def test_admin_changelist_count(self):
+        queryset = EventAdmin(Event, admin.site).get_queryset(RequestFactory().get('/admin/event_users/event/'))
+        self.assertEqual(queryset.get(pk=self.event.pk).registered_count, 3)
+
+
+class PurgeDeletedEventsSweepTest(TestCase):
+    @mock.patch('event_users.tasks.purge_deleted_event.delay')
+    def test_only_stale_deletions_are_re_enqueued(self, delay):
+        organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        events = {}
+        for name, deleted_ago in (('stale', timedelta(hours=3)), ('in_progress', timedelta(minutes=5))):
+            events[name] = Event.objects.create(
+                title=name, description='', location='Hall A', capacity=10, organizer=organizer,
+                start_time=now() + timedelta(days=1), end_time=now() + timedelta(days=1, hours=2),
+            )
+            Event.objects.filter(pk=events[name].pk).update(is_deleted=True, deleted_at=now() - deleted_ago)
+
+        purge_deleted_events()
+        delay.assert_called_once_with(events['stale'].pk)
+
+
+class EventSeriesTest(TestCase):
+    def setUp(self):
+        self.organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.organizer)
+        self.first_start = (now() + timedelta(days=1)).replace(microsecond=0)
+
+    def _create(self, **fields):
+        data = {
+            'title': 'Weekly meetup', 'description': 'Meetup', 'location': 'Hall A', 'capacity': 20,
+            'frequency': EventSeries.WEEKLY, 'interval': 1, 'first_start': self.first_start.isoformat(),
+            'duration': '02:00:00', **fields,
+        }
+        return self.client.post(reverse('event-series-list'), data, format='json')
+
+    def test_zero_interval_is_rejected(self):
+        response = self._create(interval=0)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('interval', response.data)
+        self.assertFalse(EventSeries.objects.exists())
+
+    @mock.patch('event_users.tasks.purge_deleted_event.delay')
+    def test_shortening_until_removes_later_occurrences(self, delay):
+        response = self._create(until=(self.first_start + timedelta(weeks=5)).isoformat())
+        self.assertEqual(response.status_code, 201, response.data)
+        series = EventSeries.objects.get()
+        self.assertEqual(series.occurrences.count(), 6)
+
+        until = self.first_start + timedelta(weeks=2, days=3)
+        response = self.client.patch(
+            reverse('event-series-detail', args=[series.pk]), {'until': until.isoformat()}, format='json',
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        remaining = list(series.occurrences.order_by('start_time').values_list('start_time', flat=True))
+        self.assertEqual(remaining, [self.first_start + timedelta(weeks=week) for week in range(3)])
+        self.assertEqual(delay.call_count, 3)
+
+        series.refresh_from_db()
+        self.assertEqual(series.materialized_until, self.first_start + timedelta(weeks=2))
+
+
+class WebhookReceiver(BaseHTTPRequestHandler):
+    """Local stand-in for a subscriber: records each delivery and answers with `server.status`."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((dict(self.headers), body))
+        self.send_response(self.server.status)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(WEBHOOK_BATCH_SIZE=2, WEBHOOK_VISIBILITY_LAG=30, WEBHOOK_BACKOFF_BASE=10)
+class OutboxRelayTest(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), WebhookReceiver)
+        self.server.received = []
+        self.server.status = 200
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        self.subscriber = WebhookSubscriber.objects.create(
+            name='crm', url=f'http://127.0.0.1:{self.server.server_port}/hook', secret='s3cret',
+        )
+        self.rows = record_events(OutboxEvent.REGISTERED, 1, [10, 11, 12, 13, 14])
+        OutboxEvent.objects.update(created_at=now() - timedelta(minutes=1))
+
+    def test_batches_are_signed_and_move_the_cursor(self):
+        self.assertEqual(relay_to_subscriber(self.subscriber), 5)
+
+        self.assertEqual(len(self.server.received), 3)
+        delivered = []
+        for headers, body in self.server.received:
+            expected = hmac.new(b's3cret', body, hashlib.sha256).hexdigest()
+            self.assertEqual(headers['X-Webhook-Signature'], f'sha256={expected}')
+            delivered.extend(delivery['user_id'] for delivery in json.loads(body)['deliveries'])
+        self.assertEqual(delivered, [10, 11, 12, 13, 14])
+        self.assertEqual(self.server.received[0][0]['X-Webhook-Delivery'], f'{self.rows[0].id}-{self.rows[1].id}')
+
+        self.subscriber.refresh_from_db()
+        self.assertEqual(self.subscriber.last_delivered_id, self.rows[-1].id)
+
+    def test_failure_backs_off_and_keeps_the_cursor(self):
+        self.server.status = 500
+        self.assertEqual(relay_to_subscriber(self.subscriber), 0)
+        self.assertEqual(relay_to_subscriber(self.subscriber), 0)
+
+        self.subscriber.refresh_from_db()
+        self.assertEqual(self.subscriber.last_delivered_id, 0)
+        self.assertEqual(self.subscriber.failure_count, 2)
+        backoff = (self.subscriber.next_attempt_at - now()).total_seconds()
+        self.assertTrue(15 < backoff <= 20, backoff)
+
+    def test_recent_rows_wait_for_the_visibility_lag(self):
+        OutboxEvent.objects.filter(id__gte=self.rows[3].id).update(created_at=now())
+        self.assertEqual(relay_to_subscriber(self.subscriber), 3)
+        self.subscriber.refresh_from_db()
+        self.assertEqual(self.subscriber.last_delivered_id, self.rows[2].id)
+
+    def test_overlapping_run_does_not_move_the_cursor_back(self):
+        stale = WebhookSubscriber.objects.get(pk=self.subscriber.pk)
+        WebhookSubscriber.objects.filter(pk=self.subscriber.pk).update(last_delivered_id=self.rows[3].id)
+
+        self.assertEqual(relay_to_subscriber(stale), 0)
+        self.subscriber.refresh_from_db()
+        self.assertEqual(self.subscriber.last_delivered_id, self.rows[3].id)
+
+
+@override_settings(AUDIT_LOG_FLUSH_INTERVAL=0, AUDIT_LOG_FLUSH_SIZE=3, AUDIT_LOG_MAX_BUFFER=4, AUDIT_LOG_WRITER='direct')
+class AuditBufferTest(TestCase):
+    def _entries(self, count, user_id=1):
+        return [
+            AuditLogEntry(action=AuditLogEntry.REGISTERED, event_id=1, user_id=user_id + index, occurred_at=now())
+            for index in range(count)
+        ]
+
+    def test_full_batch_is_written_inline(self):
+        buffer = AuditBuffer()
+        buffer.add(self._entries(2))
+        self.assertFalse(AuditLogEntry.objects.exists())
+        buffer.add(self._entries(1, user_id=3))
+        self.assertEqual(sorted(AuditLogEntry.objects.values_list('user_id', flat=True)), [1, 2, 3])
+        self.assertEqual(buffer.entries, [])
+
+    @override_settings(AUDIT_LOG_FLUSH_INTERVAL=0.01)
+    def test_background_thread_flushes_on_interval(self):
+        buffer = AuditBuffer()
+        flushed = threading.Event()
+        with mock.patch.object(buffer, '_write', side_effect=lambda batch: flushed.set()) as write:
+            buffer.add(self._entries(1))
+            self.assertTrue(flushed.wait(5))
+        self.assertNotEqual(buffer._thread, threading.current_thread())
+        self.assertEqual(len(write.call_args.args[0]), 1)
+
+    def test_failed_write_is_requeued_in_order(self):
+        buffer = AuditBuffer()
+        buffer.entries = self._entries(2)
+        with mock.patch.object(buffer, '_write', side_effect=DatabaseError('database is locked')):
+            self.assertEqual(buffer.flush(), 0)
+        buffer.entries += self._entries(1, user_id=3)
+        self.assertEqual(buffer.flush(), 3)
+        self.assertEqual(list(AuditLogEntry.objects.order_by('id').values_list('user_id', flat=True)), [1, 2, 3])
+
+    def test_full_buffer_spills_instead_of_retrying_inline(self):
+        buffer = AuditBuffer()
+        with mock.patch.object(buffer, '_write', side_effect=DatabaseError('database is locked')) as write:
+            buffer.add(self._entries(4))
+            with self.assertLogs('event_users.audit.spill', 'WARNING') as spill:
+                buffer.add(self._entries(2, user_id=5))
+        self.assertEqual(write.call_count, 1)
+        self.assertEqual(buffer.spilled, 2)
+        self.assertEqual([entry.user_id for entry in buffer.entries], [3, 4, 5, 6])
+        self.assertEqual([json.loads(line.split(':', 2)[2])['user_id'] for line in spill.output], [1, 2])
+
+    def test_entries_wait_for_commit_and_vanish_on_rollback(self):
+        with mock.patch.object(audit_buffer, 'add') as add:
+            with self.captureOnCommitCallbacks(execute=True):
+                audit(AuditLogEntry.REGISTERED, 1, 1)
+                with self.assertRaises(ValueError), transaction.atomic():
+                    audit(AuditLogEntry.CANCELLED, 1, 2)
+                    raise ValueError
+                add.assert_not_called()
+        [entries] = add.call_args.args
+        self.assertEqual([(entry.action, entry.user_id) for entry in entries], [(AuditLogEntry.REGISTERED, 1)])
+
+    def test_buffer_is_flushed_at_exit(self):
+        script = (
+            'import django; django.setup()\n'
+            'from event_users.audit import audit_buffer\n'
+            'from event_users.models import AuditLogEntry\n'
+            'audit_buffer._write = lambda batch: print("flushed", len(batch))\n'
+            'audit_buffer.add([AuditLogEntry(action="registered", event_id=1, user_id=1)])\n'
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='event_management.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(result.stdout.strip(), 'flushed 1')
+
+
+class UserDirectoryTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('alice', email='alice@example.com', password='secret', role='Attendee')
+        CustomUser.objects.create_user('bob', email='bob@example.com', password='secret', role='Attendee')
+        self.client = APIClient()
+
+    def test_anonymous_users_cannot_list_or_search(self):
+        self.assertEqual(self.client.get(reverse('user-list'), {'search': 'ali'}).status_code, 401)
+        self.assertEqual(self.client.get(reverse('user-detail', args=[self.user.pk])).status_code, 401)
+
+    def test_sign_up_stays_open(self):
+        response = self.client.post(reverse('user-list'), {
+            'username': 'carol', 'email': 'carol@example.com', 'password': 'secret', 'role': 'Attendee',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+    def test_prefix_search(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse('user-list'), {'search': 'bob@'})
+        self.assertEqual([user['username'] for user in response.data['results']], ['bob'])
+
+
+class AttendeeUploadCleanupTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_upload_is_deleted_when_the_import_fails(self):
+        file_path = default_storage.save('imports/attendees.csv', ContentFile(b'username,password\nalice,\xff\xfe\n'))
+        with self.assertRaises(UnicodeDecodeError):
+            import_attendees_file(file_path, 'csv')
+        self.assertFalse(default_storage.exists(file_path))
+
+    def test_stale_uploads_are_purged(self):
+        stale = default_storage.save('imports/stale.csv', ContentFile(b'username,password\n'))
+        fresh = default_storage.save('imports/fresh.csv', ContentFile(b'username,password\n'))
+        old = (now() - timedelta(hours=7)).timestamp()
+        os.utime(default_storage.path(stale), (old, old))
+
+        self.assertEqual(purge_stale_imports(), 1)
+        self.assertFalse(default_storage.exists(stale))
+        self.assertTrue(default_storage.exists(fresh))
+
+
+class CheckInManifestTest(TestCase):
+    def setUp(self):
+        email = mock.patch('event_users.tasks.send_event_registration_email.delay')
+        email.start()
+        self.addCleanup(email.stop)
+        self.organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.event = Event.objects.create(
+            title='Launch', description='', location='Hall A', capacity=10, organizer=self.organizer,
+            start_time=now() + timedelta(days=1), end_time=now() + timedelta(days=1, hours=2),
+        )
+        self.attendees = [
+            CustomUser.objects.create_user(f'attendee{index}', password='secret', role='Attendee') for index in range(3)
+        ]
+        self.client = APIClient()
+        for attendee in self.attendees[:2]:
+            self.client.force_authenticate(attendee)
+            self.assertEqual(self.client.post(reverse('register-for-event', args=[self.event.pk])).status_code, 201)
+        self.client.force_authenticate(self.organizer)
+        self.url = reverse('check-in-manifest', args=[self.event.pk])
+
+    def test_pack_round_trip(self):
+        for ids in ([], [1], [3, 70, 2 ** 40]):
+            self.assertEqual(list(unpack_ids(pack_ids(ids))), ids)
+
+    def test_manifest_is_signed(self):
+        manifest = self.client.get(self.url).data
+        payload = load_manifest(manifest['manifest'])
+        self.assertEqual(list(unpack_ids(payload['attendees'])), [attendee.id for attendee in self.attendees[:2]])
+        self.assertEqual(payload['version'], manifest['version'])
+
+        with self.assertRaises(signing.BadSignature):
+            load_manifest(manifest['manifest'][:-2] + ('AA' if not manifest['manifest'].endswith('AA') else 'BB'))
+        with override_settings(CHECK_IN_MANIFEST_KEY='another key'), self.assertRaises(signing.BadSignature):
+            load_manifest(manifest['manifest'])
+
+    def test_version_follows_registrations(self):
+        before = self.client.get(self.url).data['version']
+        self.client.force_authenticate(self.attendees[2])
+        self.client.post(reverse('register-for-event', args=[self.event.pk]))
+        self.client.force_authenticate(self.organizer)
+        self.assertGreater(self.client.get(self.url).data['version'], before)
+
+    def test_delta_upload(self):
+        first, second, unregistered = (attendee.id for attendee in self.attendees)
+        version = self.client.get(self.url).data['version']
+        response = self.client.post(self.url, {'check_ins': [first, unregistered], 'base_version': version}, format='json')
+        self.assertEqual(response.data['checked_in'], [first])
+        self.assertEqual(response.data['rejected'], [unregistered])
+        self.assertFalse(response.data['stale_base_version'])
+        self.assertGreater(response.data['version'], version)
+
+        response = self.client.post(self.url, {'check_ins': [first, second], 'base_version': version}, format='json')
+        self.assertEqual(response.data['checked_in'], [second])
+        self.assertEqual(response.data['already_checked_in'], [first])
+        self.assertTrue(response.data['stale_base_version'])
+        self.assertEqual(list(unpack_ids(load_manifest(response.data['manifest'])['checked_in'])), [first, second])
+
+    def test_booleans_are_not_user_ids(self):
+        response = self.client.post(self.url, {'check_ins': [True]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(TICKET_SIGNING_KEYS={'v1': 'first key'}, TICKET_SIGNING_KEY_ID='v1')
+class TicketCheckInTest(TestCase):
+    def setUp(self):
+        organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.event = Event.objects.create(
+            title='Launch', description='', location='Hall A', capacity=10, organizer=organizer,
+            start_time=now() + timedelta(hours=1), end_time=now() + timedelta(hours=3),
+        )
+        self.attendee = CustomUser.objects.create_user('attendee', password='secret', role='Attendee')
+        self.registration = Registration.objects.create(event=self.event, user=self.attendee)
+        self.client = APIClient()
+        self.client.force_authenticate(self.attendee)
+        self.url = reverse('check-in-for-event', args=[self.event.pk])
+
+    def test_round_trip(self):
+        ticket = issue_ticket(self.registration)
+        self.assertEqual(verify_ticket(ticket), (self.registration.id, self.event.id, self.attendee.id))
+
+    def test_key_rotation(self):
+        old_ticket = issue_ticket(self.registration)
+        with self.settings(TICKET_SIGNING_KEYS={'v1': 'first key', 'v2': 'second key'}, TICKET_SIGNING_KEY_ID='v2'):
+            new_ticket = issue_ticket(self.registration)
+            self.assertEqual(new_ticket.split('.')[3], 'v2')
+            self.assertEqual(verify_ticket(old_ticket), verify_ticket(new_ticket))
+        with self.settings(TICKET_SIGNING_KEYS={'v2': 'second key'}, TICKET_SIGNING_KEY_ID='v2'):
+            with self.assertRaisesMessage(InvalidTicket, "Unknown ticket signing key 'v1'"):
+                verify_ticket(old_ticket)
+
+    def test_tampered_tickets_are_rejected(self):
+        registration_id, event_id, user_id, key_id, signature = issue_ticket(self.registration).split('.')
+        forged = [
+            f'{registration_id}.{event_id}.{user_id + "1"}.{key_id}.{signature}',
+            f'{registration_id}.{event_id}.{user_id}.{key_id}.{signature[::-1]}',
+            f'{registration_id}.{event_id}.{user_id}.v9.{signature}',
+            f'{registration_id}.{event_id}.{user_id}',
+        ]
+        for ticket in forged:
+            with self.assertRaises(InvalidTicket):
+                verify_ticket(ticket)
+
+    def test_check_in_is_a_single_update(self):
+        ticket = issue_ticket(self.registration)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {'ticket': ticket}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertNotIn('SELECT', statements)
+        self.assertEqual(statements.count('UPDATE'), 1)
+
+        response = self.client.post(self.url, {'ticket': ticket}, format='json')
+        self.assertEqual(response.data['detail'], 'You are already checked in.')
+
+    def test_soft_deleted_event_does_not_check_in(self):
+        Event.objects.filter(pk=self.event.pk).update(is_deleted=True, deleted_at=now())
+        response = self.client.post(self.url, {'ticket': issue_ticket(self.registration)}, format='json')
+        self.assertEqual(response.status_code, 404)
+        self.registration.refresh_from_db()
+        self.assertFalse(self.registration.checked_in)
+
+
+class ScheduleConflictTest(TestCase):
+    def test_find_conflicts_matches_pairwise_comparison(self):
+        rng = random.Random(7)
+        intervals = []
+        for key in range(200):
+            start = rng.randrange(0, 1000)
+            intervals.append((key, start, start + rng.randrange(1, 60)))
+
+        expected = {}
+        for key, start, end in intervals:
+            overlapping = sorted(other for other, other_start, other_end in intervals
+                                 if other != key and other_start < end and start < other_end)
+            if overlapping:
+                expected[key] = overlapping
+        found = {key: sorted(others) for key, others in find_conflicts(intervals).items()}
+        self.assertEqual(found, expected)
+
+    def test_touching_intervals_do_not_conflict(self):
+        self.assertEqual(dict(find_conflicts([('a', 0, 10), ('b', 10, 20)])), {})
+
+    @mock.patch('event_users.tasks.send_event_registration_email.delay')
+    def test_overlapping_registration_is_refused_on_request(self, delay):
+        organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        attendee = CustomUser.objects.create_user('attendee', password='secret', role='Attendee')
+        start = now() + timedelta(days=1)
+        booked, overlapping, later = (
+            Event.objects.create(
+                title=title, description='', location='Hall A', capacity=10, organizer=organizer,
+                start_time=start + offset, end_time=start + offset + timedelta(hours=2),
+            )
+            for title, offset in (('Booked', timedelta()), ('Overlapping', timedelta(hours=1)), ('Later', timedelta(hours=2)))
+        )
+        Registration.objects.create(event=booked, user=attendee)
+        client = APIClient()
+        client.force_authenticate(attendee)
+
+        response = client.post(reverse('register-for-event', args=[overlapping.pk]), {'check_conflicts': 'true'}, format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['conflicting_events'], [booked.pk])
+        # Back to back is not an overlap, and without the flag the check is skipped
+        response = client.post(reverse('register-for-event', args=[later.pk]), {'check_conflicts': 'true'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        response = client.post(reverse('register-for-event', args=[overlapping.pk]), format='json')
+        self.assertEqual(response.status_code, 201)
+
+        schedule = {row['event_id']: row['conflicts_with'] for row in client.get(reverse('my-schedule')).data}
+        self.assertEqual(schedule, {booked.pk: [overlapping.pk], overlapping.pk: [booked.pk, later.pk], later.pk: [overlapping.pk]})
+
+
+class AvailableEventsFeedTest(TestCase):
+    def setUp(self):
+        organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.attendee = CustomUser.objects.create_user('attendee', password='secret', role='Attendee')
+        other = CustomUser.objects.create_user('other', password='secret', role='Attendee')
+        start = now() + timedelta(days=1)
+
+        def create(title, offset, capacity=10):
+            return Event.objects.create(
+                title=title, description='', location='Hall A', capacity=capacity, organizer=organizer,
+                start_time=start + offset, end_time=start + offset + timedelta(hours=1),
+            )
+
+        # Pairs share a start time, so the cursor has to break ties on id
+        self.open = [create(f'Open {index}', timedelta(hours=index // 2)) for index in range(5)]
+        full = create('Full', timedelta(minutes=30), capacity=1)
+        Registration.objects.create(event=full, user=other)
+        registered = create('Registered', timedelta(minutes=45))
+        Registration.objects.create(event=registered, user=self.attendee)
+        create('Past', -timedelta(days=2))
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.attendee)
+
+    def test_cursor_walks_the_open_events_in_order(self):
+        seen, params = [], {'page_size': 2}
+        while True:
+            response = self.client.get(reverse('available-events'), params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(event['id'] for event in response.data['results'])
+            if response.data['next'] is None:
+                break
+            params['after'] = response.data['next']
+        self.assertEqual(seen, [event.pk for event in self.open])
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(reverse('available-events'), {'after': 'yesterday,1'})
+        self.assertEqual(response.status_code, 400)
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class NearbyEventsTest(TestCase):
+    # (latitude, longitude, radius_km): ordinary, across the antimeridian, and around the north pole
+    centres = ((52.52, 13.40, 15), (52.5, 179.95, 10), (89.95, 30.0, 20))
+
+    def setUp(self):
+        self.organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.rng = random.Random(43)
+
+    def _scatter(self, latitude, longitude, spread, count=150):
+        points = []
+        for index in range(count):
+            lat = max(-90.0, min(90.0, latitude + self.rng.uniform(-spread, spread)))
+            if latitude > 89:
+                lon = self.rng.uniform(-180, 180)  # All around the pole
+            else:
+                lon = (longitude + self.rng.uniform(-spread, spread) + 180) % 360 - 180
+            event = Event.objects.create(
+                title=f'Event {index}', description='', location='Somewhere', capacity=10, organizer=self.organizer,
+                start_time=now() + timedelta(days=1), end_time=now() + timedelta(days=1, hours=1),
+                latitude=lat, longitude=lon,
+            )
+            points.append((event.pk, lat, lon))
+        return points
+
+    def test_geohash_reference_value(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744), 'u4pruydqq')
+
+    def test_cells_cover_every_point_in_the_box(self):
+        for latitude, longitude, radius_km in self.centres:
+            min_lat, max_lat, lon_ranges = bounding_box(latitude, longitude, radius_km)
+            cells = covering_cells(min_lat, max_lat, lon_ranges)
+            self.assertLessEqual(len(cells), 16)
+            for _ in range(500):
+                west, east = self.rng.choice(lon_ranges)
+                point = encode_geohash(self.rng.uniform(min_lat, max_lat), self.rng.uniform(west, east))
+                self.assertTrue(any(point.startswith(cell) for cell in cells), (latitude, longitude, point))
+
+    def test_matches_brute_force(self):
+        for latitude, longitude, radius_km in self.centres:
+            with self.subTest(latitude=latitude, longitude=longitude):
+                Event.objects.all().delete()
+                points = self._scatter(latitude, longitude, spread=0.3)
+                expected = sorted(
+                    (haversine_km(latitude, longitude, lat, lon), pk) for pk, lat, lon in points
+                )
+                expected = [(pk, distance) for distance, pk in expected if distance <= radius_km][:20]
+                self.assertGreater(len(expected), 5)
+
+                found = nearby_events(Event.objects.all(), latitude, longitude, radius_km, 20)
+                self.assertEqual([pk for pk, _ in found], [pk for pk, _ in expected])
+                for (_, distance), (_, expected_distance) in zip(found, expected):
+                    self.assertAlmostEqual(distance, expected_distance, places=6)
+
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class ReportPartitionMergeTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        organizer = CustomUser.objects.create_user('organizer', password='secret', role='Organizer')
+        self.events = [
+            Event.objects.create(
+                title=f'Event "{index}", part {index}', description='', location='Hall A', capacity=10, organizer=organizer,
+                start_time=now() - timedelta(days=60), end_time=now() - timedelta(days=60, hours=-1),
+            )
+            for index in range(2)
+        ]
+        attendees = [CustomUser.objects.create_user(f'attendee{index}', password='secret', role='Attendee') for index in range(3)]
+        registrations = [(0, 0), (0, 1), (0, 2), (1, 1), (1, 2)]
+        for event_index, attendee_index in registrations:
+            Registration.objects.create(event=self.events[event_index], user=attendees[attendee_index], checked_in=attendee_index == 1)
+        # One event's rows live in the archive by now; the report still includes them
+        archive_event_registrations(self.events[1])
+
+        self.partitions = []
+        for event in self.events:
+            stream = io.StringIO(newline='')
+            write_partition(event, stream)
+            self.partitions.append(default_storage.save(f'reports/partition_{event.id}.csv', ContentFile(stream.getvalue().encode('utf-8'))))
+        self.expected = [
+            (self.events[event_index].id, self.events[event_index].title, attendees[attendee_index].id)
+            for event_index, attendee_index in registrations
+        ]
+
+    def test_csv_merge_keeps_one_header(self):
+        output = io.BytesIO()
+        merge_csv_partitions(self.partitions, output)
+        rows = list(csv.reader(io.StringIO(output.getvalue().decode('utf-8'), newline='')))
+        self.assertEqual(rows[0], PARTITION_COLUMNS)
+        self.assertEqual([(int(row[0]), row[1], int(row[2])) for row in rows[1:]], self.expected)
+
+    @skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_columnar_merge(self):
+        import pyarrow.parquet as pq
+
+        for output_format in ('parquet', 'arrow'):
+            with self.subTest(output_format=output_format):
+                output = io.BytesIO()
+                merge_columnar_partitions(self.partitions, output, output_format)
+                output.seek(0)
+                table = pq.read_table(output) if output_format == 'parquet' else pyarrow.ipc.open_file(output).read_all()
+                self.assertEqual(table.column_names, PARTITION_COLUMNS)
+                self.assertEqual(table.schema.field('Registration Time').type, pyarrow.timestamp('us', tz='UTC'))
+                rows = list(zip(*(table.column(name).to_pylist() for name in ('Event ID', 'Event Title', 'User ID'))))
+                self.assertEqual(rows, self.expected)
+                self.assertEqual(sum(table.column('Checked In').to_pylist()), 2)
+
+
+class AdaptiveConcurrencyMiddlewareTest(SimpleTestCase):
+    def test_stays_async_under_asgi(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = AdaptiveConcurrencyMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(middleware.process_view))
+
+    async def test_async_path_sheds_and_releases(self):
+        async def get_response(request):
+            return HttpResponse()
+
+        middleware = AdaptiveConcurrencyMiddleware(get_response)
+        limit = get_limit('write')
+        self.addCleanup(setattr, limit, 'limit', limit.limit)
+        limit.limit, limit.in_flight = 1.0, 0
+
+        first = RequestFactory().post('/api/events/')
+        first.resolver_match = None
+        self.assertIsNone(await middleware.process_view(first, None, (), {}))
+        second = RequestFactory().post('/api/events/')
+        second.resolver_match = None
+        shed = await middleware.process_view(second, None, (), {})
+        self.assertEqual(shed.status_code, 503)
+        self.assertIn('Retry-After', shed)
+
+        await middleware(first)
+        self.assertEqual(limit.in_flight, 0)
@@ -0,0 +1,46 @@
+import base64
+import hashlib
+import hmac
+
+from django.conf import settings
+
+
+class InvalidTicket(Exception):
+    """Raised when a ticket token is malformed, signed with an unknown key or tampered with."""
+
+
+def _sign(key_id, message):
+    try:
+        key = settings.TICKET_SIGNING_KEYS[key_id]
+    except KeyError:
+        raise InvalidTicket(f"Unknown ticket signing key '{key_id}'.")
+    digest = hmac.new(key.encode('utf-8'), f'{key_id}.{message}'.encode('utf-8'), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
+
+
+def issue_ticket(registration):
+    """
+    Return a compact ticket token (QR payload) for a registration:
+    "<registration_id>.<event_id>.<user_id>.<key_id>.<signature>".
+    """
+    key_id = settings.TICKET_SIGNING_KEY_ID
+    message = f'{registration.id}.{registration.event_id}.{registration.user_id}'
+    return f'{message}.{key_id}.{_sign(key_id, message)}'
+
+
+def verify_ticket(token):
+    """Check a ticket's signature and return (registration_id, event_id, user_id) without a database read."""
+    parts = str(token).split('.')
+    if len(parts) != 5:
+        raise InvalidTicket("Malformed ticket.")
+
+    registration_id, event_id, user_id, key_id, signature = parts
+    message = f'{registration_id}.{event_id}.{user_id}'
+    # Any key still listed in TICKET_SIGNING_KEYS verifies, so tickets survive a key rotation
+    if not hmac.compare_digest(_sign(key_id, message), signature):
+        raise InvalidTicket("Invalid ticket signature.")
+
+    try:
+        return int(registration_id), int(event_id), int(user_id)
+    except ValueError:
+        raise InvalidTicket("Malformed ticket.")
@@ -1,14 +1,25 @@
+from django.conf import settings
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     RegisterUserView,
     LoginUserView,
+    RefreshTokenView,
     UserViewSet,
     EventViewSet,
+    EventSeriesViewSet,
     RegistrationViewSet,
+    MyScheduleView,
     AvailableEventsView,
+    NearbyEventsView,
     RegistrationsReportView,
     CapacityStatusView,
+    CapacityOverviewView,
+    CombinedRegistrationsReportView,
+    AttendeeImportView,
+    CheckInManifestView,
+    ConcurrencyLimitsView,
+    EventAuditLogView,
+    MyAuditLogView,
     # ReportStatusView,
 )
 
@@ -19,7 +30,10 @@ urlpatterns = [
     path('users/<int:pk>/', UserViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='user-detail'),  # User detail
     path('events/', EventViewSet.as_view({'get': 'list', 'post': 'create'}), name='event-list'),
     path('events/<int:pk>/', EventViewSet.as_view({'get': 'retrieve', 'put': 'update', 'delete': 'destroy'}), name='event-detail'),
+    path('event-series/', EventSeriesViewSet.as_view({'get': 'list', 'post': 'create'}), name='event-series-list'),
+    path('event-series/<int:pk>/', EventSeriesViewSet.as_view({'get': 'retrieve', 'put': 'update', 'patch': 'partial_update'}), name='event-series-detail'),
     path('events/available/', AvailableEventsView.as_view(), name='available-events'),
+    path('events/nearby/', NearbyEventsView.as_view(), name='nearby-events'),  # ?lat=&lon=&radius_km=
 
     # Event registration
     path('events/<int:pk>/register/', EventViewSet.as_view({'post': 'register'}), name='register-for-event'),
@@ -33,15 +47,57 @@ urlpatterns = [
     # Registration management
     path('registrations/', RegistrationViewSet.as_view({'get': 'list'}), name='registration-list'),
 
+    # The attendee's upcoming schedule with overlapping events flagged
+    path('schedule/', MyScheduleView.as_view(), name='my-schedule'),
+
     # Generate registration report
     path('events/<int:event_id>/registrations-report/', RegistrationsReportView.as_view(), name='registrations-report'),
 
     # Check event capacity status
     path('events/<int:event_id>/capacity-status/', CapacityStatusView.as_view(), name='capacity-status'),
 
+    # Offline check-in manifest for door devices (GET) and upload of queued check-ins (POST)
+    path('events/<int:event_id>/check-in-manifest/', CheckInManifestView.as_view(), name='check-in-manifest'),
+
+    # Bulk attendee import (organizers only)
+    path('attendees/import/', AttendeeImportView.as_view(), name='attendee-import'),
+
+    # Combined report across many events, generated in parallel
+    path('events/registrations-report/', CombinedRegistrationsReportView.as_view(), name='combined-registrations-report'),
+
+    # Capacity status for many events at once (organizer dashboards)
+    path('events/capacity-status/', CapacityOverviewView.as_view(), name='capacity-overview'),
+
     # path('report-status/<str:task_id>/', ReportStatusView.as_view(), name='report-status'),  # Add this line to check the status of the code...
 
-    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/refresh/', RefreshTokenView.as_view(), name='token_refresh'),
+
+    # Audit trail of registrations, check-ins and cancellations
+    path('events/<int:event_id>/audit-log/', EventAuditLogView.as_view(), name='event-audit-log'),
+    path('audit-log/', MyAuditLogView.as_view(), name='my-audit-log'),
+
+    # Adaptive concurrency limiter state for monitoring (staff only)
+    path('ops/concurrency/', ConcurrencyLimitsView.as_view(), name='concurrency-limits'),
 
 ]
 
+
+if settings.USE_ASYNC_VIEWS:
+    from .async_views import (
+        AsyncAvailableEventsView,
+        AsyncCapacityStatusView,
+        AsyncEventDetailView,
+        AsyncRegistrationListView,
+    )
+
+    # Under ASGI the read-heavy routes are served by native async views on the same URLs
+    async_views = {
+        'event-detail': AsyncEventDetailView.as_view(),
+        'available-events': AsyncAvailableEventsView.as_view(),
+        'registration-list': AsyncRegistrationListView.as_view(),
+        'capacity-status': AsyncCapacityStatusView.as_view(),
+    }
+    urlpatterns = [
+        path(str(pattern.pattern), async_views[pattern.name], name=pattern.name) if pattern.name in async_views else pattern
+        for pattern in urlpatterns
+    ]
@@ -1,21 +1,39 @@
 
-from django.shortcuts import render, get_object_or_404
-from rest_framework import viewsets, status
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.shortcuts import get_object_or_404
+from rest_framework import viewsets, status, filters
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from rest_framework.decorators import action
 from django.utils.timezone import now
-from .models import CustomUser, Event, Registration
-from .serializers import CustomUserSerializer, EventSerializer, RegistrationSerializer
-from .tasks import generate_registration_report, send_event_registration_email  # Import the Celery tasks
-from celery.result import AsyncResult
+from .models import CustomUser, Event, Registration, OutboxEvent, EventSeries, AuditLogEntry
+from .serializers import CustomUserSerializer, EventSerializer, RegistrationSerializer, EventSeriesSerializer, RedisTokenRefreshSerializer, AuditLogEntrySerializer
+# Celery tasks and the bulk importer are imported where they are used, so web workers don't load them at startup
 from django_filters import rest_framework as django_filters
-from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
-from rest_framework import viewsets, filters
+from rest_framework.pagination import CursorPagination
+from django.db.models import Q
+from django.core.cache import cache
+from django.conf import settings
+from django.core.files.storage import default_storage
+from rest_framework.parsers import MultiPartParser
+from .manifests import build_manifest, apply_check_in_delta, manifest_version
+from .tickets import InvalidTicket, issue_ticket, verify_ticket
+from .outbox import record_event
+from .audit import audit
+from .archive import registered_count, registered_count_annotation, registration_history
+from .reports import REPORT_FORMATS
+from .schedule import find_conflicts
+from .feeds import InvalidFeedQuery, available_events_feed, feed_page
+from .geo import nearby_events
+from .middleware import concurrency_state
+from .series import materialize_series, propagate_series_changes, truncate_series
+import uuid
+from django.db import transaction
+from rest_framework_simplejwt.views import TokenRefreshView
+from .security import LoginUsernameThrottle, LoginIPThrottle, TokenRefreshUserThrottle, TokenRefreshIPThrottle
 
 
 
@@ -44,6 +62,8 @@ class RegisterUserView(APIView):
 
 class LoginUserView(APIView):
     permission_classes = [AllowAny]
+    # Rejects credential-stuffing bursts before authenticate() runs the password hasher
+    throttle_classes = [LoginUsernameThrottle, LoginIPThrottle]
 
     def post(self, request):
         username = request.data.get('username')
@@ -70,10 +90,54 @@ class LoginUserView(APIView):
         return Response({'error': 'Invalid username or password'}, status=status.HTTP_401_UNAUTHORIZED)
 
 
+class RefreshTokenView(TokenRefreshView):
+    """Token refresh with rate limiting and the Redis-backed refresh token blacklist."""
+    serializer_class = RedisTokenRefreshSerializer
+    throttle_classes = [TokenRefreshUserThrottle, TokenRefreshIPThrottle]
+
+
+class UserDirectoryPagination(CursorPagination):
+    """Keyset pagination on id, so a page costs the same no matter how deep it is and no COUNT(*) is run."""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = 'id'
+
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
-    permission_classes = [AllowAny]  # Allow any user to access user endpoints
+    pagination_class = UserDirectoryPagination
+    filter_backends = ()  # Search and role filters are applied in get_queryset
+
+    def get_permissions(self):
+        # Sign-up stays open; the directory and its email prefix search are for signed-in users only
+        if self.action == 'create':
+            return [AllowAny()]
+        return [IsAuthenticated()]
+
+    def get_queryset(self):
+        queryset = CustomUser.objects.all()
+        if self.action != 'list':
+            return queryset
+
+        # Load only the directory columns: no password hashes, no groups/permissions
+        queryset = queryset.only('id', 'username', 'email', 'role')
+
+        role = self.request.query_params.get('role')
+        if role:
+            queryset = queryset.filter(role=role)
+
+        # Prefix matching as a range (not LIKE 'x%', which SQLite and non-pattern_ops
+        # PostgreSQL indexes can't serve), so each branch is a username/email index range scan
+        search = self.request.query_params.get('search')
+        if search:
+            upper = search + '\uffff'
+            queryset = queryset.filter(
+                Q(username__gte=search, username__lt=upper) | Q(email__gte=search, email__lt=upper)
+            )
+
+        return queryset
 
 class IsOrganizerPermission(IsAuthenticated):
     """Custom permission to allow only organizers to perform certain actions."""
@@ -132,9 +196,19 @@ class EventViewSet(viewsets.ModelViewSet):
         # Only organizers can delete events
         if request.user.role != 'Organizer':
             raise PermissionDenied("Only organizers can delete events.")
-        request.data['organizer'] = request.user.id  # Automatically set the organizer
+        event = self.get_object()
+
+        # Soft-delete so the event disappears from listings immediately;
+        # its registrations are removed in batches by a background task
+        from .tasks import purge_deleted_event
 
-        return super().destroy(request, *args, **kwargs)
+        Event.objects.filter(pk=event.pk).update(is_deleted=True, deleted_at=now())
+        task = purge_deleted_event.delay(event.pk)
+
+        return Response({
+            'task_id': task.id,
+            'detail': 'Event deleted. Its registrations are being removed in the background.'
+        }, status=status.HTTP_202_ACCEPTED)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAttendeePermission])
     def register(self, request, pk=None):
@@ -149,18 +223,44 @@ class EventViewSet(viewsets.ModelViewSet):
         if Registration.objects.filter(event=event, user=user).exists():
             return Response({'detail': 'You are already registered for this event.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        registered_count = Registration.objects.filter(event=event).count()
-        if registered_count >= event.capacity:
-            return Response({'detail': 'This event is full.'}, status=status.HTTP_400_BAD_REQUEST)
-
-        Registration.objects.create(event=event, user=user)
+        # Optional overlap check: a range query over the attendee's own registrations
+        check_conflicts = request.data.get('check_conflicts', settings.REGISTRATION_CHECK_CONFLICTS)
+        if str(check_conflicts).lower() in ('1', 'true', 'yes'):
+            conflicting = list(Registration.objects.filter(
+                user=user,
+                event__is_deleted=False,
+                event__start_time__lt=event.end_time,
+                event__end_time__gt=event.start_time,
+            ).values_list('event_id', flat=True))
+            if conflicting:
+                return Response({
+                    'detail': 'This event overlaps with events you are already registered for.',
+                    'conflicting_events': conflicting,
+                }, status=status.HTTP_409_CONFLICT)
+
+        # The outbox row commits or rolls back together with the registration. On SQLite the
+        # transaction holds the write lock from BEGIN, so the capacity count can't go stale
+        with transaction.atomic():
+            registered_count = Registration.objects.filter(event=event).count()
+            if registered_count >= event.capacity:
+                return Response({'detail': 'This event is full.'}, status=status.HTTP_400_BAD_REQUEST)
+            registration = Registration.objects.create(event=event, user=user)
+            record_event(OutboxEvent.REGISTERED, event.id, user.id, registration_id=registration.id)
+            audit(AuditLogEntry.REGISTERED, event.id, user.id, registration_id=registration.id)
+        from .tasks import send_event_registration_email
         send_event_registration_email.delay(user.email, event.title)
-        return Response({'detail': 'Successfully registered for the event.'}, status=status.HTTP_201_CREATED)
+        return Response({
+            'detail': 'Successfully registered for the event.',
+            'ticket': issue_ticket(registration),  # Signed QR payload presented at check-in
+        }, status=status.HTTP_201_CREATED)
     
 
     @action(detail=True, methods=['post'], permission_classes=[IsAttendeePermission])
     def check_in(self, request, pk=None):
         """Attendee checks in to an event."""
+        if 'ticket' in request.data:
+            return self._check_in_with_ticket(request, pk)
+
         event = get_object_or_404(Event, pk=pk)
         user = request.user
 
@@ -171,27 +271,159 @@ class EventViewSet(viewsets.ModelViewSet):
         if registration.checked_in:
             return Response({'detail': 'You are already checked in.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        registration.checked_in = True
-        registration.save()
+        with transaction.atomic():
+            registration.checked_in = True
+            registration.save()
+            record_event(OutboxEvent.CHECKED_IN, event.id, user.id, registration_id=registration.id)
+            audit(AuditLogEntry.CHECKED_IN, event.id, user.id, registration_id=registration.id)
         return Response({'detail': 'Successfully checked in.'}, status=status.HTTP_200_OK)
+
+    def _check_in_with_ticket(self, request, pk):
+        """Check in from a signed ticket: the signature replaces the event/registration reads."""
+        try:
+            registration_id, event_id, user_id = verify_ticket(request.data['ticket'])
+        except InvalidTicket as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if event_id != int(pk) or user_id != request.user.id:
+            return Response({'detail': 'This ticket is not valid for this event.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # A single conditional UPDATE; it only matches a registration that still exists and is not
+        # checked in, for an event that hasn't been soft-deleted while its purge is pending
+        with transaction.atomic():
+            updated = Registration.objects.filter(
+                pk=registration_id, event_id=event_id, user_id=user_id, checked_in=False, event__is_deleted=False,
+            ).update(checked_in=True)
+            if updated:
+                record_event(OutboxEvent.CHECKED_IN, event_id, user_id, registration_id=registration_id)
+                audit(AuditLogEntry.CHECKED_IN, event_id, user_id, source='ticket', registration_id=registration_id)
+        if updated:
+            return Response({'detail': 'Successfully checked in.'}, status=status.HTTP_200_OK)
+
+        # Only the failure path reads, to tell a repeat scan from a cancelled registration
+        if Registration.objects.filter(pk=registration_id, checked_in=True).exists():
+            return Response({'detail': 'You are already checked in.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'detail': 'No registration found for this ticket.'}, status=status.HTTP_404_NOT_FOUND)
+class EventSeriesViewSet(viewsets.ModelViewSet):
+    """Recurring events: occurrences are bulk-created, and edits reach future occurrences in one UPDATE."""
+    serializer_class = EventSeriesSerializer
+    permission_classes = [IsOrganizerPermission]
+
+    def get_queryset(self):
+        return EventSeries.objects.filter(organizer=self.request.user)
+
+    def perform_create(self, serializer):
+        series = serializer.save(organizer=self.request.user)
+        materialize_series(series)
+
+    def perform_update(self, serializer):
+        changed_fields = [
+            field for field, value in serializer.validated_data.items()
+            if getattr(serializer.instance, field) != value
+        ]
+        with transaction.atomic():
+            series = serializer.save()
+            propagate_series_changes(series, changed_fields)
+            # A shortened series loses its occurrences past the new `until`, like a deleted event
+            removed = truncate_series(series) if 'until' in changed_fields else []
+
+        from .tasks import purge_deleted_event
+        for event_id in removed:
+            purge_deleted_event.delay(event_id)
+
+
 class AvailableEventsView(APIView):
     """View for attendees to see available (upcoming) events."""
     permission_classes = [IsAttendeePermission]
 
     def get(self, request):
-        # Get the current time
-        current_time = now()
+        # Future events with real remaining capacity that the attendee has not registered for yet
+        try:
+            available_events, page_size = available_events_feed(request.user, request.query_params)
+        except InvalidFeedQuery as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Filter events that have a start_time in the future and have available capacity
-        available_events = Event.objects.filter(start_time__gt=current_time, capacity__gt=0)
+        events, next_cursor = feed_page(available_events, page_size)
+        if not events and 'after' not in request.query_params:
+            return Response({'detail': 'No upcoming events available.'}, status=status.HTTP_404_NOT_FOUND)
 
         # Serialize the events and return them in the response
-        serializer = EventSerializer(available_events, many=True)
-        
-        if not available_events.exists():
-            return Response({'detail': 'No upcoming events available.'}, status=status.HTTP_404_NOT_FOUND)
+        serializer = EventSerializer(events, many=True)
+        return Response({'next': next_cursor, 'results': serializer.data}, status=status.HTTP_200_OK)
 
-        return Response(serializer.data, status=status.HTTP_200_OK)
+
+class NearbyEventsView(APIView):
+    """
+    Upcoming events within `radius_km` of (`lat`, `lon`), nearest first. Accepts the
+    EventFilter parameters too, e.g. `start_time` to only look further ahead.
+    """
+    permission_classes = [IsAuthenticated]
+    default_radius_km = 10
+    max_radius_km = 500
+    default_limit = 50
+    max_limit = 200
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            latitude = float(params['lat'])
+            longitude = float(params['lon'])
+            radius_km = float(params.get('radius_km', self.default_radius_km))
+            limit = max(1, min(int(params.get('limit', self.default_limit)), self.max_limit))
+        except KeyError:
+            return Response({'detail': 'The "lat" and "lon" parameters are required.'}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError:
+            return Response({'detail': '"lat", "lon", "radius_km" and "limit" must be numbers.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            return Response({'detail': 'Coordinates are out of range.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 < radius_km <= self.max_radius_km:
+            return Response({'detail': f'"radius_km" must be between 0 and {self.max_radius_km}.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        filterset = EventFilter(params, queryset=Event.objects.all())
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+        events = filterset.qs
+        if 'start_time' not in params:
+            events = events.filter(start_time__gte=now())
+
+        nearest = nearby_events(events, latitude, longitude, radius_km, limit)
+
+        # Only the page is loaded in full, with registered counts from correlated subqueries
+        page = Event.objects.annotate(registered_count=registered_count_annotation()).in_bulk(
+            [event_id for event_id, _ in nearest]
+        )
+
+        results = []
+        for event_id, distance in nearest:
+            data = EventSerializer(page[event_id]).data
+            data['distance_km'] = round(distance, 3)
+            results.append(data)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
+class MyScheduleView(APIView):
+    """An attendee's upcoming registered events in start order, with overlapping events flagged."""
+    permission_classes = [IsAttendeePermission]
+
+    def get(self, request):
+        # One joined query, already sorted by the database
+        registrations = Registration.objects.filter(
+            user=request.user, event__is_deleted=False, event__end_time__gt=now()
+        ).select_related('event').order_by('event__start_time', 'event__end_time')
+
+        events = [registration.event for registration in registrations]
+        conflicts = find_conflicts((event.id, event.start_time, event.end_time) for event in events)
+
+        schedule = [{
+            'event_id': event.id,
+            'title': event.title,
+            'location': event.location,
+            'start_time': event.start_time,
+            'end_time': event.end_time,
+            'checked_in': registration.checked_in,
+            'conflicts_with': sorted(conflicts.get(event.id, [])),
+        } for registration, event in zip(registrations, events)]
+        return Response(schedule, status=status.HTTP_200_OK)
 
 
 class RegistrationViewSet(viewsets.ModelViewSet):
@@ -202,15 +434,16 @@ class RegistrationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         # Attendees can only see events they registered for
         if self.request.user.role == 'Attendee':
-            return Registration.objects.filter(user=self.request.user)
+            return Registration.objects.filter(user=self.request.user, event__is_deleted=False)
         raise PermissionDenied("Only attendees can view their registrations.")
 
     def list(self, request, *args, **kwargs):
         # GET /registrations/: List all events the logged-in user (Attendee) has registered for
         if request.user.role != 'Attendee':
             raise PermissionDenied("Only attendees can view their registrations.")
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        # Past registrations may have been moved to the archive table
+        history = registration_history(user=request.user, event__is_deleted=False)
+        serializer = self.get_serializer(history, many=True)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
@@ -234,7 +467,10 @@ class RegistrationViewSet(viewsets.ModelViewSet):
             return Response({'detail': 'You can only cancel registration for future events.'}, status=status.HTTP_400_BAD_REQUEST)
 
         # Cancel the registration by deleting it
-        registration.delete()
+        with transaction.atomic():
+            record_event(OutboxEvent.CANCELLED, event.id, user.id, registration_id=registration.id)
+            audit(AuditLogEntry.CANCELLED, event.id, user.id, registration_id=registration.id)
+            registration.delete()
         return Response({'detail': 'Registration canceled successfully.'}, status=status.HTTP_200_OK)
 
 
@@ -249,6 +485,7 @@ class RegistrationsReportView(APIView):
         if event.organizer != request.user:
             return Response({'detail': 'You are not the organizer of this event.'}, status=status.HTTP_403_FORBIDDEN)
 
+        from .tasks import generate_registration_report
         task = generate_registration_report.delay(event_id)  # Generate the CSV asynchronously
         return Response({
             # 'task_id': task.id,
@@ -256,6 +493,194 @@ class RegistrationsReportView(APIView):
         }, status=status.HTTP_202_ACCEPTED)
 
 
+class AttendeeImportView(APIView):
+    """Organizers upload a CSV/JSONL file of attendees, imported in bulk by a background task."""
+    permission_classes = [IsOrganizerPermission]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        from .imports import IMPORT_FORMATS, detect_format
+
+        uploaded = request.FILES.get('file')
+        if uploaded is None:
+            return Response({'detail': 'Upload a CSV or JSONL file in the "file" field.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        file_format = request.data.get('format') or detect_format(uploaded.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response({'detail': 'Format must be "csv" or "jsonl".'}, status=status.HTTP_400_BAD_REQUEST)
+
+        event_id = request.data.get('event_id')
+        if event_id:
+            event = get_object_or_404(Event, pk=event_id)
+            if event.organizer != request.user:
+                return Response({'detail': 'You are not the organizer of this event.'}, status=status.HTTP_403_FORBIDDEN)
+            event_id = event.id
+
+        from .tasks import import_attendees_file
+
+        file_path = default_storage.save(f'imports/{uploaded.name}', uploaded)
+        try:
+            task = import_attendees_file.delay(file_path, file_format, event_id or None)
+        except Exception:
+            # Nothing will ever read the upload, and it holds plaintext passwords
+            default_storage.delete(file_path)
+            raise
+        return Response({
+            'task_id': task.id,
+            'detail': 'The attendee import has started, the error report will be saved in the reports.'
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class CombinedRegistrationsReportView(APIView):
+    """One report across many of an organizer's events, generated in parallel (?ids=1,2,3&output=csv|parquet|arrow)."""
+    permission_classes = [IsOrganizerPermission]
+
+    def get(self, request):
+        output_format = request.query_params.get('output', 'csv')  # "format" is taken by DRF content negotiation
+        if output_format not in REPORT_FORMATS:
+            return Response({'detail': f"Output must be one of: {', '.join(REPORT_FORMATS)}."}, status=status.HTTP_400_BAD_REQUEST)
+
+        events = Event.objects.filter(organizer=request.user)
+        ids = request.query_params.get('ids')
+        if ids:
+            try:
+                events = events.filter(id__in=[int(event_id) for event_id in ids.split(',') if event_id.strip()])
+            except ValueError:
+                return Response({'detail': '"ids" must be a comma-separated list of event ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        event_ids = list(events.order_by('id').values_list('id', flat=True))
+        if not event_ids:
+            return Response({'detail': 'No events found for this report.'}, status=status.HTTP_404_NOT_FOUND)
+
+        from .tasks import start_combined_report
+
+        job_id = uuid.uuid4().hex
+        start_combined_report(event_ids, job_id, output_format)
+        return Response({
+            'job_id': job_id,
+            'events': len(event_ids),
+            'detail': 'The combined registration report is being generated, You can check it in the reports.'
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class AuditLogPagination(CursorPagination):
+    """
+    Newest entries first by id, which is unique (batches share one occurred_at) and
+    walked through the per-event and per-user (…, -id) indexes.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = '-id'
+
+
+class EventAuditLogView(APIView):
+    """Registration, check-in and cancellation history of an event (its organizer only)."""
+    permission_classes = [IsOrganizerPermission]
+
+    def get(self, request, event_id):
+        event = get_object_or_404(Event.all_objects, pk=event_id)
+        if event.organizer != request.user:
+            return Response({'detail': 'You are not the organizer of this event.'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Entries are written behind, so the last couple of seconds may not be visible yet
+        entries = AuditLogEntry.objects.filter(event_id=event.id)
+        if request.query_params.get('action'):
+            entries = entries.filter(action=request.query_params['action'])
+        paginator = AuditLogPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        return paginator.get_paginated_response(AuditLogEntrySerializer(page, many=True).data)
+
+
+class MyAuditLogView(APIView):
+    """The requesting user's own registration, check-in and cancellation history."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        paginator = AuditLogPagination()
+        page = paginator.paginate_queryset(AuditLogEntry.objects.filter(user_id=request.user.id), request, view=self)
+        return paginator.get_paginated_response(AuditLogEntrySerializer(page, many=True).data)
+
+
+class ConcurrencyLimitsView(APIView):
+    """Adaptive concurrency limiter state of the worker process serving the request (staff only)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response({'groups': concurrency_state()}, status=status.HTTP_200_OK)
+
+
+class CapacityOverviewView(APIView):
+    """Capacity status for all of an organizer's events (or ?ids=1,2,3) from one query, archived registrations included."""
+    permission_classes = [IsOrganizerPermission]
+
+    def get(self, request):
+        ids = request.query_params.get('ids')
+        try:
+            event_ids = sorted({int(event_id) for event_id in ids.split(',') if event_id.strip()}) if ids else None
+        except ValueError:
+            return Response({'detail': '"ids" must be a comma-separated list of event ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        cache_seconds = getattr(settings, 'CAPACITY_OVERVIEW_CACHE_SECONDS', 0)
+        cache_key = f"capacity-overview:{request.user.id}:{','.join(map(str, event_ids)) if event_ids else 'all'}"
+        if cache_seconds:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return Response(cached, status=status.HTTP_200_OK)
+
+        events = Event.objects.filter(organizer=request.user)
+        if event_ids is not None:
+            events = events.filter(id__in=event_ids)
+        rows = events.order_by('start_time').annotate(
+            registered_count=registered_count_annotation(),
+            checked_in_count=registered_count_annotation(checked_in=True),
+        ).values('id', 'title', 'capacity', 'registered_count', 'checked_in_count')
+
+        overview = [{
+            'event_id': row['id'],
+            'title': row['title'],
+            'total_capacity': row['capacity'],
+            'registered_count': row['registered_count'],
+            'remaining_capacity': row['capacity'] - row['registered_count'],
+            'checked_in_count': row['checked_in_count'],
+        } for row in rows]
+
+        if cache_seconds:
+            cache.set(cache_key, overview, cache_seconds)
+        return Response(overview, status=status.HTTP_200_OK)
+
+
+class CheckInManifestView(APIView):
+    """Signed attendee manifest for door devices, and bulk upload of their offline check-ins."""
+    permission_classes = [IsOrganizerPermission]
+
+    def get_event(self, request, event_id):
+        event = get_object_or_404(Event, pk=event_id)
+        if event.organizer != request.user:
+            raise PermissionDenied("You are not the organizer of this event.")
+        return event
+
+    def get(self, request, event_id):
+        event = self.get_event(request, event_id)
+        return Response(build_manifest(event), status=status.HTTP_200_OK)
+
+    def post(self, request, event_id):
+        event = self.get_event(request, event_id)
+
+        user_ids = request.data.get('check_ins')
+        # JSON true/false would otherwise pass as user ids 1 and 0
+        if not isinstance(user_ids, list) or not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+            return Response({'detail': '"check_ins" must be a list of user ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The device worked from an older manifest if anything changed since the one it names
+        base_version = request.data.get('base_version')
+        stale = base_version is not None and base_version != manifest_version(event)
+        result = apply_check_in_delta(event, user_ids, actor_id=request.user.id)
+        result['stale_base_version'] = stale
+        result.update(build_manifest(event))
+        return Response(result, status=status.HTTP_200_OK)
+
+
 class CapacityStatusView(APIView):
     permission_classes = [IsOrganizerPermission]  # Only organizers can access capacity status
 
@@ -266,12 +691,12 @@ class CapacityStatusView(APIView):
             return Response({'detail': 'You are not the organizer of this event.'}, status=status.HTTP_403_FORBIDDEN)
 
         total_capacity = event.capacity
-        registered_count = Registration.objects.filter(event=event).count()
-        remaining_capacity = total_capacity - registered_count
+        registered = registered_count(event)
+        remaining_capacity = total_capacity - registered
 
         return Response({
             'total_capacity': total_capacity,
-            'registered_count': registered_count,
+            'registered_count': registered,
             'remaining_capacity': remaining_capacity
         }, status=status.HTTP_200_OK)
 